@@ -1,4 +1,335 @@
-with open("Practicefile.txt","r") as f:
-    data = f.read()
-    data_change = data.replace("java","python")
-    print(data_change)
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# -------------------------------
+# CONFIG
+# -------------------------------
+INPUT_FILE = "Practicefile.txt"
+DEFAULT_RULES = {"java": "python"}
+CHUNK_SIZE = 1024 * 1024
+INDEX_FILE = ".hash-index.json"
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules"}
+BINARY_SNIFF = 8192  # a NUL byte in this much of the head marks a binary file
+
+
+# -------------------------------
+# RULES
+# -------------------------------
+class Rewriter:
+    """Every replacement rule folded into one regex, applied in a single pass.
+
+    Longer literals come first in the alternation, so at any position the
+    longest rule wins; matching is leftmost and non-overlapping, exactly
+    as one re.sub over the whole file would do it.
+    """
+
+    def __init__(self, rules):
+        self.table = {old.encode(): new.encode() for old, new in rules.items() if old}
+        if not self.table:
+            raise ValueError("no replacement rules")
+        literals = sorted(self.table, key=len, reverse=True)
+        self.pattern = re.compile(b"|".join(map(re.escape, literals)))
+        self.longest = len(literals[0])
+
+    def rewrite(self, src, dst, chunk_size=CHUNK_SIZE):
+        """Copy binary stream src to dst with replacements; returns the match count.
+
+        Only the last (longest rule - 1) bytes of each chunk are held back,
+        unless a match that starts before them runs further, so memory
+        stays at about one chunk however large the input is.
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")  # read(0) would look like EOF
+        table, pattern = self.table, self.pattern
+        count = 0
+        buf = b""
+        while True:
+            block = src.read(chunk_size)
+            buf += block
+            # Matches starting before `safe` can see every byte they might need
+            safe = len(buf) if not block else max(0, len(buf) - self.longest + 1)
+            out = []
+            pos = 0
+            for m in pattern.finditer(buf):
+                if m.start() >= safe:
+                    break
+                out.append(buf[pos:m.start()])
+                out.append(table[m.group()])
+                pos = m.end()
+                count += 1
+            cut = max(pos, safe)
+            out.append(buf[pos:cut])
+            dst.write(b"".join(out))
+            buf = buf[cut:]
+            if not block:
+                return count
+
+
+def load_rules(args):
+    rules = {}
+    if args.rules:
+        with open(args.rules, encoding="utf-8") as f:
+            rules.update(json.load(f))
+    for rule in args.rule or ():
+        old, sep, new = rule.partition("=")
+        if not sep:
+            raise SystemExit(f"❌ Rule must look like OLD=NEW: {rule}")
+        rules[old] = new
+    return rules or DEFAULT_RULES
+
+
+# -------------------------------
+# FILES
+# -------------------------------
+def rewrite_file(path, output, rewriter, chunk_size=CHUNK_SIZE):
+    """Rewrite path into output (may be the same file) via a temp file and rename.
+
+    Readers of output see either the old content or the complete new
+    content, never a half-written file.
+    """
+    folder = os.path.dirname(os.path.abspath(output))
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".hash-", suffix=".tmp")
+    try:
+        # fdopen first: it owns (and closes) the temp fd even if opening path fails
+        with os.fdopen(fd, "wb") as dst, open(path, "rb") as src:
+            count = rewriter.rewrite(src, dst, chunk_size)
+        shutil.copymode(path, tmp)
+        os.replace(tmp, output)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return count
+
+
+# -------------------------------
+# DIRECTORY MODE
+# -------------------------------
+def walk_files(root, on_error=None):
+    """Yield (path, mtime_ns, size) for regular files under root, skipping VCS/cache dirs.
+
+    A directory or file that can't be read (or vanished mid-walk) is
+    passed to on_error(path, error) and skipped; without a handler the
+    error is raised.
+    """
+    def failed(path, error):
+        if on_error is None:
+            raise error
+        on_error(path, error)
+
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False) and not entry.name.startswith(".hash-"):
+                        try:
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError as error:
+                            failed(entry.path, error)
+                            continue
+                        yield entry.path, st.st_mtime_ns, st.st_size
+        except OSError as error:
+            failed(folder, error)
+
+
+def file_digest(path):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChangeIndex:
+    """mtime/size/content-hash of every file as the last run left it.
+
+    A file whose mtime and size are unchanged is skipped without being
+    opened; one that was only touched is skipped after hashing. The
+    index is tied to the rule set, so new rules start from scratch.
+    """
+
+    def __init__(self, path, rules):
+        self.path = path
+        self.rules = hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+        self.files = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("rules") == self.rules:
+                self.files = state["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self, files):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".hash-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "rules": self.rules, "files": files}, f)
+        os.replace(tmp, self.path)
+        self.files = files
+
+
+_worker_rewriter = None
+
+
+def _init_worker(rules):
+    global _worker_rewriter
+    _worker_rewriter = Rewriter(rules)
+
+
+def process_file(task):
+    """Worker: hash, prefilter and (if needed) rewrite one file.
+
+    Returns (path, matches, bytes read, index entry or None, error or
+    None). The prefilter is a plain substring search per literal, far
+    cheaper than the regex, run while the file is hashed in CHUNK_SIZE
+    reads; binary files are left alone. Plain reads (not mmap) mean a
+    file truncated meanwhile just comes out shorter.
+    """
+    path = task[0]
+    try:
+        return _process_file(*task) + (None,)
+    except OSError as error:  # unreadable, or gone since the walk
+        return path, 0, 0, None, error.strerror or str(error)
+
+
+def _process_file(path, known, dry_run):
+    rewriter = _worker_rewriter
+    keep = rewriter.longest - 1  # bytes a literal can straddle across reads
+    digest = hashlib.blake2b()
+    size = 0
+    hit = binary = False
+    tail = b""
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            if not size:
+                binary = b"\0" in block[:BINARY_SNIFF]
+            size += len(block)
+            digest.update(block)
+            if not (hit or binary):
+                window = tail + block
+                hit = any(literal in window for literal in rewriter.table)
+                tail = window[-keep:] if keep else b""
+        st = os.fstat(f.fileno())
+    digest = digest.hexdigest()
+    if not hit or digest == known:
+        return path, 0, size, [st.st_mtime_ns, st.st_size, digest]
+    if dry_run:
+        with open(path, "rb") as src, open(os.devnull, "wb") as dst:
+            return path, rewriter.rewrite(src, dst), size, None
+    count = rewrite_file(path, path, rewriter)
+    st = os.stat(path)
+    return path, count, size, [st.st_mtime_ns, st.st_size, file_digest(path)]
+
+
+def rewrite_tree(root, rules, index_path=None, workers=None, dry_run=False):
+    """Rewrite every matching file under root in place, in a process pool.
+
+    Returns (files rewritten, replacements, errors).
+    """
+    index = ChangeIndex(index_path or os.path.join(root, INDEX_FILE), rules)
+    index_file = os.path.abspath(index.path)
+    start = time.perf_counter()
+    files, tasks = {}, []
+    total = errors = 0
+
+    def walk_error(path, error):
+        nonlocal errors
+        errors += 1
+        print(f"⚠ {path}: {error.strerror or error}")
+        # Keep what the index knows below an unreadable path, so those files
+        # aren't rewritten a second time once they can be read again
+        rel = os.path.relpath(path, root)
+        prefix = "" if rel == os.curdir else rel + os.sep
+        files.update((name, entry) for name, entry in index.files.items()
+                     if name == rel or name.startswith(prefix))
+
+    for path, mtime_ns, size in walk_files(root, walk_error):
+        if os.path.abspath(path) == index_file:
+            continue
+        total += 1
+        rel = os.path.relpath(path, root)
+        known = index.files.get(rel)
+        if known:
+            files[rel] = known  # until a result replaces it, so a failed run loses nothing
+        if not (known and known[:2] == [mtime_ns, size]):
+            tasks.append((path, known[2] if known else None, dry_run))
+
+    matched = replaced = scanned = 0
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(rules,)) as pool:
+            for path, count, size, entry, error in pool.map(process_file, tasks, chunksize=64):
+                scanned += size
+                if error:
+                    errors += 1
+                    print(f"⚠ {path}: {error}")
+                if count:
+                    matched += 1
+                    replaced += count
+                    print(f"✏ {path}: {count:,}")
+                if entry:
+                    files[os.path.relpath(path, root)] = entry
+    finally:
+        # Files already rewritten must be in the index even if the run stops
+        # early, or the next run would apply the rules to them again
+        if not dry_run:
+            index.save(files)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"\n📂 {total:,} files | "
+          f"{len(tasks):,} checked | {matched:,} rewritten | {replaced:,} replacements"
+          + (f" | {errors:,} errors" if errors else ""))
+    print(f"⏱ {elapsed:.2f}s | {scanned / 1e6 / elapsed:.1f} MB/s | "
+          f"{len(tasks) / elapsed:,.0f} files/s checked")
+    return matched, replaced, errors
+
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {text}")
+    return value
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Streaming find-and-replace")
+    parser.add_argument("input", nargs="?", default=INPUT_FILE, help="file, or directory to rewrite in place")
+    parser.add_argument("-o", "--output", help="write here instead of printing")
+    parser.add_argument("-i", "--in-place", action="store_true", help="rewrite the input file")
+    parser.add_argument("-r", "--rule", action="append", metavar="OLD=NEW",
+                        help="replacement rule, repeatable (default java=python)")
+    parser.add_argument("--rules", metavar="JSON", help='file with {"old": "new", ...}')
+    parser.add_argument("--chunk-size", type=positive_int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="directory mode: processes (default: CPUs)")
+    parser.add_argument("--index", help=f"directory mode: change index (default DIR/{INDEX_FILE})")
+    parser.add_argument("--dry-run", action="store_true", help="directory mode: count, don't write")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rules = load_rules(args)
+    if os.path.isdir(args.input):
+        errors = rewrite_tree(args.input, rules, args.index, args.workers, args.dry_run)[2]
+        raise SystemExit(1 if errors else 0)
+    rewriter = Rewriter(rules)
+    output = args.input if args.in_place else args.output
+
+    if output:
+        count = rewrite_file(args.input, output, rewriter, args.chunk_size)
+        print(f"✅ {count:,} replacements written to {output}")
+    else:
+        with open(args.input, "rb") as f:
+            rewriter.rewrite(f, sys.stdout.buffer, args.chunk_size)
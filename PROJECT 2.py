@@ -1,26 +1,1142 @@
 import re
-from collections import defaultdict
+import os
+import math
+import mmap
+import csv
+import sys
+import json
+import time
+import sqlite3
+import glob
+import gzip
+import zlib
+import heapq
+import socket
+import base64
+import hashlib
+import ipaddress
+import argparse
+import pathlib
+from collections import defaultdict, Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # .zst rotations are skipped without it
+    zstandard = None
 
 LOG_FILE = "system.log"
 FAILED_LOGIN_PATTERN = r"Failed password for .* from (\d+\.\d+\.\d+\.\d+)"
+FAILED_LOGIN_RE = re.compile(FAILED_LOGIN_PATTERN)
+CHUNK_SIZE = 32 << 20  # bytes per parallel work item
 
 ip_attempts = defaultdict(int)
+threat_counts = defaultdict(Counter)  # rule name -> hits per IP (or user)
+source_counts = {}  # rule name -> SourceCounts, for IP rules once use_counters() is called
 
-def analyze_logs():
-    with open(LOG_FILE, "r") as file:
+def analyze_logs(path=LOG_FILE):
+    with open(path, "r") as file:
         for line in file:
-            match = re.search(FAILED_LOGIN_PATTERN, line)
+            match = FAILED_LOGIN_RE.search(line)
             if match:
                 ip = match.group(1)
                 ip_attempts[ip] += 1
 
-def generate_report():
+# -------------------------------
+# THREAT RULES
+# -------------------------------
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    title: str
+    literal: bytes  # every matching line contains this; cheap to look for
+    pattern: bytes  # regex run only on lines holding the literal
+    key: str = "ip"  # group to count by
+
+
+IP = rb"(?P<ip>\d+\.\d+\.\d+\.\d+)"
+DEFAULT_RULES = (
+    Rule("failed_password", "Failed password", b"Failed password for ",
+         rb"Failed password for .* from " + IP),  # same as FAILED_LOGIN_PATTERN
+    Rule("invalid_user", "Invalid user", b"Invalid user ",
+         rb"Invalid user (?P<user>\S*) from " + IP),
+    Rule("max_auth_attempts", "Too many authentication failures",
+         b"maximum authentication attempts exceeded",
+         rb"maximum authentication attempts exceeded for (?:invalid user )?(?P<user>\S+) from " + IP),
+    Rule("pam_auth_failure", "PAM authentication failure", b"authentication failure;",
+         rb"authentication failure;.*\brhost=" + IP),
+    Rule("sudo_failure", "Repeated sudo failures", b"incorrect password attempt",
+         rb"sudo:\s+(?P<user>\S+) : (?:\d+ )?incorrect password attempts?", key="user"),
+)
+
+
+def load_rules(path):
+    """Rules from a JSON list of {name, title, literal, pattern[, key]} objects"""
+    with open(path) as f:
+        return tuple(Rule(r["name"], r.get("title", r["name"]), r["literal"].encode(),
+                          r["pattern"].encode(), r.get("key", "ip")) for r in json.load(f))
+
+
+class RuleEngine:
+    """Counts rule hits in raw bytes without decoding or splitting lines.
+
+    For each rule, bytes.find jumps from one occurrence of its literal to
+    the next; only the line around a hit is handed to the compiled regex.
+    Since almost no lines match, nearly all the work is a memchr-speed
+    substring search over the buffer.
+    """
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = [(rule, re.compile(rule.pattern)) for rule in rules]
+
+    def matches(self, data, start=0, end=None):
+        """(rule, match, line start) for each hit in data[start:end] (whole
+        lines), rule by rule. Each regex runs on its line alone, so ^ and $
+        anchor to the line; match.string is that line and line start is
+        its offset in data."""
+        end = len(data) if end is None else end
+        for rule, regex in self.rules:
+            pos = data.find(rule.literal, start, end)
+            while pos != -1:
+                line_start = data.rfind(b"\n", start, pos) + 1 or start
+                line_end = data.find(b"\n", pos, end)
+                if line_end == -1:
+                    line_end = end
+                # Text mode also breaks lines on \r; look for one only inside
+                # this line so CRLF logs need no normalised copy
+                line_start = data.rfind(b"\r", line_start, pos) + 1 or line_start
+                cr = data.find(b"\r", pos, line_end)
+                if cr != -1:
+                    line_end = cr
+                match = regex.search(data[line_start:line_end])
+                if match:
+                    yield rule, match, line_start
+                pos = data.find(rule.literal, line_end, end)
+
+    def scan(self, data, start=0, end=None, counts=None):
+        """Add hits in data[start:end] (whole lines) to counts[rule name][key]"""
+        counts = defaultdict(Counter) if counts is None else counts
+        for rule, match, _ in self.matches(data, start, end):
+            counts[rule.name][match.group(rule.key).decode(errors="replace")] += 1
+        return counts
+
+
+@lru_cache(maxsize=None)
+def rule_engine(rules=DEFAULT_RULES):
+    return RuleEngine(rules)
+
+
+def record_counts(counts):
+    for name, counter in counts.items():
+        if name in source_counts:
+            source_counts[name].update(counter)
+        else:
+            threat_counts[name].update(counter)
+    if "failed_password" not in source_counts:
+        for ip, count in counts.get("failed_password", {}).items():
+            ip_attempts[ip] += count
+
+
+def analyze_logs_fast(path=LOG_FILE, rules=DEFAULT_RULES):
+    """All rules over the memory-mapped log in this process, a CHUNK_SIZE
+    block at a time so each batch handed to record_counts stays bounded"""
+    if not os.path.getsize(path):
+        return
+    engine = rule_engine(rules)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start, end in line_blocks(mm):
+            record_counts(engine.scan(mm, start, end))
+
+# -------------------------------
+# PARALLEL SCAN
+# -------------------------------
+def line_blocks(mm, chunk_size=CHUNK_SIZE):
+    """(start, end) byte ranges of a mapped log, about chunk_size each, that end on a newline"""
+    size = len(mm)
+    bounds = []
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            newline = mm.find(b"\n", end - 1)
+            end = size if newline == -1 else newline + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def chunk_bounds(path, chunk_size=CHUNK_SIZE):
+    """line_blocks of the log file at path"""
+    if not os.path.getsize(path):
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return line_blocks(mm, chunk_size)
+
+
+def count_chunk(path, start, end, rules=DEFAULT_RULES):
+    """Rule hits in one newline-aligned byte range of the log"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return rule_engine(rules).scan(mm, start, end)
+
+
+def analyze_logs_parallel(path=LOG_FILE, workers=None, chunk_size=CHUNK_SIZE, rules=DEFAULT_RULES):
+    """analyze_logs_fast with one memory-mapped chunk per process-pool task"""
+    bounds = chunk_bounds(path, chunk_size)
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(count_chunk, path, start, end, rules) for start, end in bounds]
+        for future in futures:
+            record_counts(future.result())
+
+# -------------------------------
+# FOLLOW MODE
+# -------------------------------
+MONTHS = {m: i for i, m in enumerate(b"Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec".split(), 1)}
+
+
+@lru_cache(maxsize=4096)
+def _syslog_epoch(stamp, year):
+    month, day, clock = stamp.split()
+    hour, minute, second = clock.split(b":")
+    return time.mktime((year, MONTHS[month], int(day), int(hour), int(minute), int(second), 0, 0, -1))
+
+
+def parse_timestamp(line, now=None):
+    """Epoch seconds from a syslog ("Jan  2 10:00:01") or ISO 8601 line prefix, else None"""
+    now = time.time() if now is None else now
+    try:
+        if line[:3] in MONTHS:
+            year = time.localtime(now).tm_year
+            t = _syslog_epoch(line[:15], year)
+            # Syslog stamps carry no year: one from the future is last year's
+            return _syslog_epoch(line[:15], year - 1) if t > now + 86400 else t
+        if line[:4].isdigit():
+            return datetime.fromisoformat(line.split(None, 1)[0].decode()).timestamp()
+    except (ValueError, KeyError, UnicodeDecodeError):
+        pass
+    return None
+
+
+class BruteForceDetector:
+    """Flags a source once it has `limit` failures within `window` seconds.
+
+    Only a source's last `limit` failure times are needed to test that, so
+    each keeps a deque of that length; sources idle for longer than the
+    window are swept, and `max_sources` caps the table, so memory stays
+    bounded however long it runs.
+    """
+    def __init__(self, limit=5, window=60.0, max_sources=100_000):
+        self.limit = limit
+        self.window = window
+        self.max_sources = max_sources
+        self.sources = OrderedDict()  # key -> [recent times, last alert], least recently seen first
+        self.latest = -math.inf
+
+    def add(self, key, t):
+        """Record a failure at time t; returns the span of the last `limit`
+        failures in seconds when this one raises an alert, else None"""
+        entry = self.sources.get(key)
+        if entry is None:
+            entry = self.sources[key] = [deque(maxlen=self.limit), -math.inf]
+        else:
+            self.sources.move_to_end(key)
+        times = entry[0]
+        times.append(t)
+        self.latest = max(self.latest, t)
+        self._expire()
+        span = times[-1] - times[0]
+        # Re-alert at most once per window while an attack keeps going
+        if len(times) == self.limit and span <= self.window and t - entry[1] > self.window:
+            entry[1] = t
+            return span
+        return None
+
+    def _expire(self):
+        cutoff = self.latest - self.window
+        while self.sources:
+            key, (times, alerted) = next(iter(self.sources.items()))
+            if len(self.sources) <= self.max_sources and max(times[-1], alerted) >= cutoff:
+                break
+            del self.sources[key]
+
+
+class LogFollower:
+    """Reads lines appended to a log as it grows, surviving rotation (the
+    path now names a new file) and truncation (copytruncate)"""
+    READ_SIZE = 8 << 20
+    MAX_LINE = 1 << 20
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.file = None
+        self.inode = None
+        self.partial = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end):
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            self.file = None
+            return
+        st = os.fstat(self.file.fileno())
+        self.inode = (st.st_dev, st.st_ino)
+        if seek_end:
+            self.file.seek(0, os.SEEK_END)
+
+    def read(self):
+        """Complete new lines as one bytes buffer, empty when there are none"""
+        if self.file is None:
+            self._open(seek_end=False)  # (re)created since we last looked
+            if self.file is None:
+                return b""
+        data = self.file.read(self.READ_SIZE)
+        if len(data) < self.READ_SIZE:  # caught up: has the file been replaced?
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            if st is None or (st.st_dev, st.st_ino) != self.inode:
+                data += self.file.read() + b"\n"  # the old file's last line is final
+                self.file.close()
+                self._open(seek_end=False)
+            elif st.st_size < self.file.tell():
+                self.file.seek(0)
+                self.partial = b""
+                data = self.file.read(self.READ_SIZE)
+        data = self.partial + data
+        cut = data.rfind(b"\n") + 1
+        self.partial = data[cut:] if len(data) - cut <= self.MAX_LINE else b""
+        return data[:cut]
+
+
+def follow_logs(path=LOG_FILE, rules=DEFAULT_RULES, limit=5, window=60.0, poll=0.25,
+                from_start=False):
+    """Tail the log and alert as soon as a source crosses `limit` hits in `window` seconds"""
+    engine = rule_engine(rules)
+    detector = BruteForceDetector(limit, window)
+    follower = LogFollower(path, from_start)
+    print(f"👀 Following {path}: alert at {limit} hits within {window:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            data = follower.read()
+            if not data:
+                time.sleep(poll)
+                continue
+            now = time.time()
+            # In log order, so each source's window sees its failures in sequence
+            for rule, match, line_start in sorted(engine.matches(data), key=lambda hit: hit[2]):
+                line = match.string[:40]
+                t = parse_timestamp(line, now) or now
+                key = match.group(rule.key).decode(errors="replace")
+                span = detector.add((rule.key, key), t)
+                if span is not None:
+                    print(f"🚨 Brute force from {key}: {limit} hits in {span:.0f}s "
+                          f"({rule.title}) at {time.strftime('%H:%M:%S', time.localtime(t))}",
+                          flush=True)
+    except KeyboardInterrupt:
+        pass
+
+# -------------------------------
+# INCREMENTAL RUNS
+# -------------------------------
+HEAD_BYTES = 1024  # content fingerprint that survives renames and compression
+READ_SIZE = 8 << 20
+
+
+ROTATION_SUFFIX = re.compile(r"(?:\.\d+|-\d{8})(?:\.gz|\.zst)?")
+
+
+def rotated_logs(path, exclude=()):
+    """The log and its rotations (system.log.1, system.log.2.gz,
+    system.log-20240101.zst, ...) that exist, oldest first.
+
+    Files whose path starts with one in `exclude` (a checkpoint or store
+    next to the log, and their temp/journal files) are never included.
+    """
+    skip = tuple(os.path.abspath(p) for p in exclude if p)
+    files = [p for p in glob.glob(glob.escape(path) + "[.-]*")
+             if ROTATION_SUFFIX.fullmatch(p[len(path):]) and os.path.isfile(p)
+             and not (skip and os.path.abspath(p).startswith(skip))]
+    if os.path.isfile(path):
+        files.append(path)
+    return sorted(files, key=lambda p: os.stat(p).st_mtime_ns)
+
+
+def open_log(path):
+    """Binary stream of a log's text, decompressing .gz and .zst on the fly"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("reading .zst logs needs the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+# What a damaged or half-written archive can raise while being read
+READ_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+class CheckpointStore:
+    """What earlier runs already counted, one entry per log file.
+
+    An entry remembers the file's inode, size and mtime, a hash of its
+    first HEAD_BYTES of content, how far into the (decompressed) content
+    it was read and the rule counts from that part. Unchanged files are
+    skipped without opening them; a grown log resumes at its offset; a
+    rotation compressed into a new file is recognised by its head and
+    fast-forwarded. Files that disappear take their counts with them.
+    """
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)["files"]
+        except FileNotFoundError:
+            self.entries = []
+        except (ValueError, KeyError, TypeError) as error:  # corrupt or partly written
+            print(f"⚠ Ignoring unreadable checkpoint {path}: {error}")
+            self.entries = []
+
+    def save(self, entries):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "files": entries}, f)
+        os.replace(tmp, self.path)
+        self.entries = entries
+
+
+def _head_matches(entry, head):
+    n = entry["head_len"]
+    return len(head) >= n and hashlib.sha1(head[:n]).hexdigest() == entry["head"]
+
+
+def default_checkpoint(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.checkpoint.json")
+
+
+def _pack_blob(keys, counts):
+    return {"keys": base64.b64encode(keys.astype("<u4").tobytes()).decode(),
+            "counts": base64.b64encode(counts.astype("<u8").tobytes()).decode()}
+
+
+def _unpack_blob(blob):
+    return (np.frombuffer(base64.b64decode(blob["keys"]), dtype="<u4").astype(np.uint32),
+            np.frombuffer(base64.b64decode(blob["counts"]), dtype="<u8").astype(np.uint64))
+
+
+def _entry_counts(entry):
+    """A checkpoint entry's counts as (string-keyed Counters, per-rule compact
+    counters), converting between the two if --counter changed since it was saved"""
+    counts = defaultdict(Counter)
+    sources = {name: level.file_counter() for name, level in source_counts.items()}
+    for name, counter in entry["counts"].items():
+        if name in sources:
+            sources[name].add(*pack_counts(counter))
+        else:
+            counts[name].update(counter)
+    for name, blob in entry.get("packed", {}).items():
+        keys, hits = _unpack_blob(blob)
+        if name in sources:
+            sources[name].add(keys, hits)
+        else:
+            counts[name].update(dict(zip(map(format_source, keys.tolist()), hits.tolist())))
+    return counts, sources
+
+
+def _save_counts(entry, counts, sources):
+    entry["counts"] = {rule: dict(counter) for rule, counter in counts.items()}
+    entry["packed"] = {rule: _pack_blob(*counter.heavy(1)) for rule, counter in sources.items()}
+
+
+def analyze_logs_incremental(path=LOG_FILE, rules=DEFAULT_RULES, checkpoint=None, verbose=True,
+                             sink=None):
+    """Count the log and its rotations, reading only bytes no earlier run has seen.
+
+    `checkpoint` is a path or an object with CheckpointStore's entries/save;
+    `sink(data, start, end)` additionally sees every newly read run of lines.
+    """
+    store = (checkpoint if hasattr(checkpoint, "entries")
+             else CheckpointStore(checkpoint or default_checkpoint(path)))
+    engine = rule_engine(rules)
+    unclaimed = list(store.entries)
+    kept = []
+    scanned = total = 0
+
+    def claim(match):
+        entry = next((e for e in unclaimed if match(e)), None)
+        if entry is not None:
+            unclaimed.remove(entry)
+        return entry
+
+    for name in rotated_logs(path, exclude=(getattr(store, "path", None),)):
+        st = os.stat(name)
+        inode = [st.st_dev, st.st_ino]
+        total += st.st_size
+        # Untouched since last run; a log that was live then still needs its
+        # unterminated last line read once it has been rotated
+        entry = claim(lambda e: e["inode"] == inode and e["size"] == st.st_size
+                      and e["mtime"] == st.st_mtime_ns and (name == path or e["complete"]))
+        if entry is not None:
+            entry["path"] = name
+            if set(entry["counts"]) & set(source_counts) or set(entry.get("packed", {})) - set(source_counts):
+                _save_counts(entry, *_entry_counts(entry))  # saved under another --counter
+            kept.append(entry)
+            continue
+
+        head = None
+        damaged = False
+        try:
+            with open_log(name) as stream:
+                head = stream.read(HEAD_BYTES)
+                entry = (claim(lambda e: e["inode"] == inode and _head_matches(e, head))
+                         or claim(lambda e: _head_matches(e, head)))
+                compressed = name.endswith((".gz", ".zst"))
+                if entry is None or (not compressed and st.st_size < entry["offset"]):
+                    entry = {"offset": 0, "counts": {}}  # new, or truncated and rewritten
+                counts, sources = _entry_counts(entry)
+
+                def add(block_counts):
+                    # Rules with compact counters never build per-file string dicts
+                    for rule_name, counter in block_counts.items():
+                        if rule_name in sources:
+                            sources[rule_name].add(*pack_counts(counter))
+                        else:
+                            counts[rule_name].update(counter)
+
+                # Carry on from the saved offset without seeking backwards over
+                # the head just read: zstd streams can only move forward
+                offset, partial = entry["offset"], b""
+                pending = head[offset:]
+                if offset > len(head):
+                    stream.seek(offset)
+                while True:
+                    block = pending or stream.read(READ_SIZE)
+                    pending = b""
+                    if not block:
+                        break
+                    data = partial + block
+                    cut = data.rfind(b"\n") + 1
+                    add(engine.scan(data, 0, cut))
+                    if sink:
+                        sink(data, 0, cut)
+                    offset += cut
+                    scanned += len(block)
+                    partial = data[cut:]
+                if partial and name != path:  # rotated files are final, even without a newline
+                    add(engine.scan(partial))
+                    if sink:
+                        sink(partial, 0, len(partial))
+                    offset += len(partial)
+        except RuntimeError as error:  # e.g. .zst without the zstandard package
+            print(f"⚠ Skipping {name}: {error}")
+            continue
+        except READ_ERRORS as error:
+            if head is None:
+                # Unreadable: keep what earlier runs counted for this file
+                entry = claim(lambda e: e["inode"] == inode)
+                if entry is not None:
+                    entry["path"] = name
+                    kept.append(entry)
+                print(f"⚠ Skipping {name}: {error}")
+                continue
+            # Damaged part-way: keep what was read, so it is neither lost nor
+            # counted again, and retry from there next run
+            damaged = True
+            print(f"⚠ {name} is damaged, counted its first {offset:,} bytes: {error}")
+
+        entry.update(path=name, inode=inode, size=st.st_size, mtime=st.st_mtime_ns,
+                     head=hashlib.sha1(head).hexdigest(), head_len=len(head), offset=offset,
+                     complete=name != path and not damaged)
+        _save_counts(entry, counts, sources)
+        kept.append(entry)
+
+    store.save(kept)
+    for entry in kept:
+        record_counts(entry["counts"])
+        for rule_name, blob in entry.get("packed", {}).items():
+            keys, hits = _unpack_blob(blob)
+            if rule_name in source_counts:
+                source_counts[rule_name].add(keys, hits)
+            else:
+                record_counts({rule_name: dict(zip(map(format_source, keys.tolist()), hits.tolist()))})
+    if verbose:
+        print(f"📦 {len(kept)} log files, {total / 1e6:.1f} MB on disk, "
+              f"{scanned / 1e6:.1f} MB of new content scanned")
+
+# -------------------------------
+# COMPACT COUNTERS
+# -------------------------------
+def pack_counts(counter):
+    """Dotted-quad keys as uint32 plus their counts; anything else is dropped"""
+    keys, counts = [], []
+    for ip, count in counter.items():
+        try:
+            keys.append(socket.inet_aton(ip))
+        except OSError:
+            continue
+        counts.append(count)
+    return (np.frombuffer(b"".join(keys), dtype=">u4").astype(np.uint32),
+            np.array(counts, dtype=np.uint64))
+
+
+def format_source(key, bits=32):
+    ip = socket.inet_ntoa((int(key) << (32 - bits)).to_bytes(4, "big"))
+    return ip if bits == 32 else f"{ip}/{bits}"
+
+
+class IpCounter:
+    """Exact counts as sorted uint32 keys with parallel counts: 12 bytes per
+    source instead of a dict entry plus a string. Incoming batches are
+    folded in once they outgrow the table, so merging stays amortised
+    O(n log n) however many chunks arrive."""
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint32)
+        self.counts = np.empty(0, dtype=np.uint64)
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, keys, counts):
+        self.pending.append((keys, counts))
+        self.pending_size += len(keys)
+        if self.pending_size > max(len(self.keys), 1 << 16):
+            self._fold()
+
+    def _fold(self):
+        if not self.pending:
+            return
+        keys = np.concatenate([self.keys] + [k for k, _ in self.pending])
+        counts = np.concatenate([self.counts] + [c for _, c in self.pending])
+        self.keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.keys)).astype(np.uint64)
+        self.pending, self.pending_size = [], 0
+
+    def heavy(self, threshold):
+        """(keys, counts) of sources with at least `threshold` hits"""
+        self._fold()
+        mask = self.counts >= threshold
+        return self.keys[mask], self.counts[mask]
+
+
+class SketchCounter:
+    """Fixed-memory heavy hitters for any number of distinct sources.
+
+    A Count-Min Sketch (depth rows of width uint32 counters) estimates
+    every source's count - never under, and over by at most e/width of the
+    total with probability 1 - e^-depth. Alongside it a Space-Saving style
+    table keeps the k sources with the largest estimates, evicting the
+    smallest when a heavier newcomer shows up.
+    """
+    PRIME = 4294967311  # > 2^32, so a*x + b stays inside uint64
+
+    def __init__(self, width=1 << 20, depth=4, k=1000, seed=0):
+        rng = np.random.default_rng(seed)
+        self.width, self.k = width, k
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self.a = rng.integers(1, 1 << 31, depth, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, self.PRIME, depth, dtype=np.uint64)[:, None]
+        self.rows = np.arange(depth)[:, None]
+        self.top = {}  # key -> estimate
+
+    def _columns(self, keys):
+        return (self.a * keys.astype(np.uint64) + self.b) % np.uint64(self.PRIME) % np.uint64(self.width)
+
+    def estimate(self, keys):
+        return self.table[self.rows, self._columns(keys)].min(axis=0)
+
+    def add(self, keys, counts):
+        if not len(keys):
+            return
+        columns = self._columns(keys)
+        for row, cols in zip(self.table, columns):
+            np.add.at(row, cols, counts.astype(np.uint32))
+        estimates = self.estimate(keys)
+        floor = min(self.top.values()) if len(self.top) >= self.k else 0
+        heavier = estimates > floor
+        self.top.update(zip(keys[heavier].tolist(), estimates[heavier].tolist()))
+        if len(self.top) > 2 * self.k:
+            self._trim()
+
+    def _trim(self):
+        if not self.top:
+            return
+        keys = np.fromiter(self.top, dtype=np.uint32, count=len(self.top))
+        estimates = self.estimate(keys).tolist()
+        self.top = dict(heapq.nlargest(self.k, zip(keys.tolist(), estimates), key=lambda kv: kv[1]))
+
+    def heavy(self, threshold):
+        self._trim()
+        pairs = [(key, count) for key, count in self.top.items() if count >= threshold]
+        return (np.array([k for k, _ in pairs], dtype=np.uint32),
+                np.array([c for _, c in pairs], dtype=np.uint64))
+
+
+class SourceCounts:
+    """Hits per IPv4 source plus /24 and /16 rollups, exact or sketched.
+
+    /16 rollups are always exact: there are only 65,536 of them.
+    """
+    LEVELS = (32, 24, 16)
+
+    def __init__(self, kind="exact"):
+        self.kind = kind
+        if kind == "sketch":
+            self.levels = {32: SketchCounter(), 24: SketchCounter(1 << 18), 16: IpCounter()}
+        else:
+            self.levels = {bits: IpCounter() for bits in self.LEVELS}
+
+    def update(self, counter):
+        self.add(*pack_counts(counter))
+
+    def file_counter(self):
+        """An empty per-source (/32) counter of the same kind, e.g. for one log file"""
+        return SketchCounter() if self.kind == "sketch" else IpCounter()
+
+    def add(self, keys, counts):
+        for bits, level in self.levels.items():
+            level.add(keys >> np.uint32(32 - bits), counts)
+
+    def top(self, bits, threshold, limit=None):
+        """Heaviest sources at a prefix length as (count, key), largest first"""
+        keys, counts = self.levels[bits].heavy(threshold)
+        pairs = zip(counts.tolist(), keys.tolist())
+        return heapq.nlargest(limit or len(keys), pairs)
+
+
+def use_counters(kind, rules=DEFAULT_RULES):
+    """Count IP-keyed rules with SourceCounts instead of dicts of strings"""
+    for rule in rules:
+        if rule.key == "ip":
+            source_counts[rule.name] = SourceCounts(kind)
+
+# -------------------------------
+# SYNTHETIC LOGS & BENCHMARK
+# -------------------------------
+USERS = ["root", "admin", "ubuntu", "deploy", "git", "postgres", "oracle", "test", "guest", "pi",
+         "alice", "bob", "carol", "jenkins", "www-data", "ftpuser", "user", "support"]
+NOISE_TEMPLATES = [
+    "CRON[{pid}]: pam_unix(cron:session): session opened for user root(uid=0) by (uid=0)",
+    "CRON[{pid}]: pam_unix(cron:session): session closed for user root",
+    "CRON[{pid}]: (root) CMD (   cd / && run-parts --report /etc/cron.hourly)",
+    "systemd[1]: Started Session {n} of User {user}.",
+    "systemd-logind[812]: New session {n} of user {user}.",
+    "systemd-logind[812]: Session {n} logged out. Waiting for processes to exit.",
+    "sshd[{pid}]: Accepted publickey for {user} from {ip} port {port} ssh2: ED25519 SHA256:Zx8{n}",
+    "sshd[{pid}]: pam_unix(sshd:session): session opened for user {user}(uid=1000) by (uid=0)",
+    "sshd[{pid}]: Received disconnect from {ip} port {port}:11: disconnected by user",
+    "sshd[{pid}]: Disconnected from user {user} {ip} port {port}",
+    "sudo:   {user} : TTY=pts/0 ; PWD=/home/{user} ; USER=root ; COMMAND=/usr/bin/apt update",
+    "kernel: [{n}.{pid}] [UFW BLOCK] IN=eth0 OUT= SRC={ip} DST=10.0.0.5 PROTO=TCP DPT=23",
+    "dhclient[{pid}]: DHCPACK of 10.0.0.5 from 10.0.0.1",
+    "postfix/smtpd[{pid}]: connect from unknown[{ip}]",
+]
+ATTACK_TEMPLATES = {
+    "failed_password": ["sshd[{pid}]: Failed password for {user} from {ip} port {port} ssh2",
+                        "sshd[{pid}]: Failed password for invalid user {user} from {ip} port {port} ssh2"],
+    "invalid_user": ["sshd[{pid}]: Invalid user {user} from {ip} port {port}"],
+    "max_auth_attempts": ["sshd[{pid}]: error: maximum authentication attempts exceeded for "
+                          "invalid user {user} from {ip} port {port} ssh2 [preauth]"],
+    "pam_auth_failure": ["sshd[{pid}]: pam_unix(sshd:auth): authentication failure; logname= uid=0 "
+                         "euid=0 tty=ssh ruser= rhost={ip}  user={user}"],
+    "sudo_failure": ["sudo:   {user} : 3 incorrect password attempts ; TTY=pts/1 ; "
+                     "PWD=/home/{user} ; USER=root ; COMMAND=/bin/bash"],
+}
+ATTACK_MIX = {"failed_password": 0.6, "invalid_user": 0.2, "max_auth_attempts": 0.05,
+              "pam_auth_failure": 0.1, "sudo_failure": 0.05}
+GENERATOR_START = 1704067200  # 2024-01-01 00:00:00 UTC
+
+
+def parse_size(text):
+    """'100MB', '1GB', '512k' or plain bytes"""
+    text = text.strip().upper().rstrip("B")
+    scale = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}.get(text[-1:], 1)
+    return int(float(text.rstrip("KMG")) * scale)
+
+
+def generate_log(path, size, seed=0, attack_rate=0.02, attackers=20, botnet=50_000,
+                 lines_per_second=200, mix=ATTACK_MIX):
+    """Write about `size` bytes of sshd/syslog traffic; the same seed gives the same file.
+
+    A fraction `attack_rate` of lines are attacks, typed by `mix`; 70% of
+    them come from `attackers` brute-force IPs, the rest from a `botnet`
+    of addresses that each try only a few times.
+    """
+    rng = np.random.default_rng(seed)
+
+    def ip(n):
+        return [f"{a}.{b}.{c}.{d}" for a, b, c, d in rng.integers(1, 255, (n, 4)).tolist()]
+
+    def render(template):
+        return template.format(pid=int(rng.integers(1000, 65000)), port=int(rng.integers(1024, 65535)),
+                               user=USERS[rng.integers(len(USERS))], ip=ip(1)[0],
+                               n=int(rng.integers(1, 99999)))
+
+    # Benign lines barely matter to the scanners, so a rendered pool is realistic enough
+    noise = [render(NOISE_TEMPLATES[i % len(NOISE_TEMPLATES)]) for i in range(4096)]
+    brute, bots = ip(attackers), ip(botnet)
+    kinds = list(mix)
+    weights = np.array([mix[k] for k in kinds]) / sum(mix.values())
+    stamps = {}
+
+    written = lines = 0
+    t = float(GENERATOR_START)
+    with open(path, "wb") as f:
+        while written < size:
+            n = 20_000
+            gaps = rng.exponential(1 / lines_per_second, n)
+            attack = rng.random(n) < attack_rate
+            picks = rng.integers(0, len(noise), n)
+            out = []
+            for gap, is_attack, pick in zip(gaps.tolist(), attack.tolist(), picks.tolist()):
+                t += gap
+                second = int(t)
+                prefix = stamps.get(second)
+                if prefix is None:
+                    stamps.clear()
+                    tm = time.gmtime(second)  # syslog pads the day with a space; %e isn't portable
+                    prefix = stamps[second] = time.strftime(f"%b {tm.tm_mday:2d} %H:%M:%S web01 ", tm)
+                if is_attack:
+                    kind = kinds[rng.choice(len(kinds), p=weights)]
+                    templates = ATTACK_TEMPLATES[kind]
+                    source = brute[rng.integers(attackers)] if rng.random() < 0.7 else bots[rng.integers(botnet)]
+                    body = templates[rng.integers(len(templates))].format(
+                        pid=int(rng.integers(1000, 65000)), port=int(rng.integers(1024, 65535)),
+                        user=USERS[rng.integers(len(USERS))], ip=source)
+                else:
+                    body = noise[pick]
+                out.append(prefix + body + "\n")
+            block = "".join(out).encode()
+            f.write(block)
+            written += len(block)
+            lines += n
+    return lines
+
+
+def reset_counts():
+    ip_attempts.clear()
+    threat_counts.clear()
+    for name in source_counts:
+        source_counts[name] = SourceCounts("sketch" if isinstance(
+            source_counts[name].levels[32], SketchCounter) else "exact")
+
+
+BENCH_MODES = ("serial", "prefilter", "parallel", "streaming", "rerun")
+
+
+def benchmark(sizes=("100MB", "1GB", "10GB"), modes=BENCH_MODES, workdir=".", seed=0, workers=None):
+    """MB/s and lines/s for each scan mode over generated logs of each size.
+
+    Logs are generated once per size and seed and reused by later runs.
+    'streaming' is a first --incremental run (fresh checkpoint), 'rerun'
+    the same again with nothing new to read.
+    """
+    print(f"\n⏱  Analyzer benchmark ({os.cpu_count()} cores)")
+    print("-" * 66)
+    print(f"{'size':>6} {'mode':<10} {'seconds':>8} {'MB/s':>8} {'lines/s':>12} {'failed pw':>10}")
+    for label in sizes:
+        size = parse_size(label)
+        path = os.path.join(workdir, f"bench-{label}-{seed}.log")
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            start = time.perf_counter()
+            generate_log(path, size, seed)
+            print(f"{label:>6} generated in {time.perf_counter() - start:.1f}s")
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = mm[:].count(b"\n") if mm.size() < 1 << 30 else sum(
+                mm[i:i + (1 << 28)].count(b"\n") for i in range(0, mm.size(), 1 << 28))
+        checkpoint = path + ".bench-checkpoint.json"
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        for mode in modes:
+            reset_counts()
+            start = time.perf_counter()
+            if mode == "serial":
+                analyze_logs(path)
+            elif mode == "prefilter":
+                analyze_logs_fast(path)
+            elif mode == "parallel":
+                analyze_logs_parallel(path, workers)
+            else:
+                analyze_logs_incremental(path, checkpoint=checkpoint, verbose=False)
+            wall = time.perf_counter() - start
+            mb = os.path.getsize(path) / 1e6
+            found = (sum(ip_attempts.values()) if mode == "serial" or "failed_password" not in source_counts else
+                     int(source_counts["failed_password"].levels[16].heavy(1)[1].sum()))
+            print(f"{label:>6} {mode:<10} {wall:8.2f} {mb / wall:8.0f} {lines / wall:12,.0f} {found:>10,}")
+        if os.path.exists(checkpoint):  # only the streaming/rerun modes create one
+            os.remove(checkpoint)
+
+# -------------------------------
+# EVENT STORE
+# -------------------------------
+class EventStore:
+    """Failure events in SQLite, indexed by source IP, time and user.
+
+    Ingestion rides on analyze_logs_incremental; its checkpoint lives in
+    the same database, so events and read progress commit together and a
+    rerun only adds what is new. IPs are stored as integers.
+
+    Rules whose pattern has no user group (their greedy .* decides which
+    IP is counted, so they stay as they are) get the username from
+    USER_FIELDS, looked up on the matched line.
+    """
+    USER_FIELDS = {
+        "failed_password": re.compile(rb"Failed password for (?:invalid user )?(?P<user>\S+) from "),
+        "pam_auth_failure": re.compile(rb"\buser=(?P<user>\S+)"),
+    }
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS events (ts REAL NOT NULL, rule TEXT NOT NULL, ip INTEGER, user TEXT);
+        CREATE INDEX IF NOT EXISTS events_ip ON events (ip, ts);
+        CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+        CREATE INDEX IF NOT EXISTS events_user ON events (user, ts);
+        CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY CHECK (id = 0), state TEXT NOT NULL);
+    """
+
+    def __init__(self, path, rules=DEFAULT_RULES):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(self.SCHEMA)
+        self.engine = rule_engine(rules)
+        self.added = 0
+        row = self.db.execute("SELECT state FROM checkpoint").fetchone()
+        self.entries = json.loads(row[0])["files"] if row else []
+
+    def save(self, entries):
+        """Checkpoint protocol: staged with the events, written by commit()"""
+        self.db.execute("INSERT OR REPLACE INTO checkpoint VALUES (0, ?)",
+                        (json.dumps({"version": 1, "files": entries}),))
+        self.entries = entries
+
+    def add(self, data, start, end):
+        """Sink for analyze_logs_incremental: store each rule hit in data[start:end]"""
+        now = time.time()
+        rows = []
+        for rule, match, _ in self.engine.matches(data, start, end):
+            groups = match.groupdict()
+            ip, user = groups.get("ip"), groups.get("user")
+            if user is None and rule.name in self.USER_FIELDS:
+                found = self.USER_FIELDS[rule.name].search(match.string)
+                user = found and found.group("user")
+            try:
+                ip = int.from_bytes(socket.inet_aton(ip.decode()), "big") if ip else None
+            except OSError:
+                ip = None
+            stamp = parse_timestamp(match.string[:40], now) or now
+            rows.append((stamp, rule.name, ip, user.decode(errors="replace") if user else None))
+        self.db.executemany("INSERT INTO events VALUES (?, ?, ?, ?)", rows)
+        self.added += len(rows)
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def store_events(path, db_path, rules=DEFAULT_RULES):
+    """Add the log's new failure events to db_path (and count them for the report)"""
+    store = EventStore(db_path, rules)
+    try:
+        analyze_logs_incremental(path, rules, checkpoint=store, verbose=False, sink=store.add)
+        store.commit()
+    finally:
+        store.close()
+    print(f"🗄  Stored {store.added:,} new events in {db_path}")
+
+
+GROUPINGS = {  # --by: SQL key, rows it applies to, what "related" lists
+    "ip": ("ip", "ip IS NOT NULL", "user"),
+    "net24": ("ip >> 8", "ip IS NOT NULL", "user"),
+    "net16": ("ip >> 16", "ip IS NOT NULL", "user"),
+    "user": ("user", "user IS NOT NULL", "ip"),
+}
+
+
+def parse_time(text):
+    """Epoch seconds from '7d' / '12h' / '30m' (ago), an epoch number or ISO 8601"""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if text[-1:] in units and text[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(text[:-1]) * units[text[-1]]
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def query_events(db_path, by="ip", threshold=1, since=None, until=None, rules=None, ip=None,
+                 user=None, limit=None):
+    """Per-source totals from the store, heaviest first, as plain dicts"""
+    key, applies, related = GROUPINGS[by]
+    where, params = [applies], []
+    if since is not None:
+        where.append("ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("ts < ?")
+        params.append(until)
+    if rules:
+        where.append(f"rule IN ({', '.join('?' * len(rules))})")
+        params.extend(rules)
+    if ip is not None:
+        where.append("ip = ?")
+        params.append(int(ipaddress.IPv4Address(ip)))
+    if user is not None:
+        where.append("user = ?")
+        params.append(user)
+    sql = (f"SELECT {key} AS source, COUNT(*) AS hits, MIN(ts), MAX(ts), "
+           f"JSON_GROUP_ARRAY(DISTINCT {related}) FROM events WHERE {' AND '.join(where)} "
+           f"GROUP BY source HAVING hits >= ? ORDER BY hits DESC")
+    params.append(threshold)
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    bits = {"ip": 32, "net24": 24, "net16": 16}.get(by)
+    # Read-only, so a mistyped path fails instead of creating an empty store
+    db = sqlite3.connect(pathlib.Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        rows = db.execute(sql, params).fetchall()
+    finally:
+        db.close()
+    results = []
+    for source, hits, first, last, others in rows:
+        others = sorted(o for o in json.loads(others) if o is not None)
+        if related == "ip":
+            others = [format_source(o) for o in others]
+        results.append({
+            by: format_source(source, bits) if bits else source,
+            "hits": hits,
+            "first_seen": datetime.fromtimestamp(first).isoformat(timespec="seconds"),
+            "last_seen": datetime.fromtimestamp(last).isoformat(timespec="seconds"),
+            "users" if related == "user" else "sources": others,
+        })
+    return results
+
+
+def write_results(results, fmt="table", out=sys.stdout):
+    if fmt == "json":
+        json.dump(results, out, indent=2)
+        out.write("\n")
+    elif fmt == "csv":
+        if results:
+            writer = csv.DictWriter(out, fieldnames=list(results[0]))
+            writer.writeheader()
+            for row in results:
+                writer.writerow({k: " ".join(v) if isinstance(v, list) else v for k, v in row.items()})
+    else:
+        print("\n🔎 Threat Query")
+        print("-" * 30)
+        for row in results:
+            source, hits, first, last, others = row.values()
+            shown = ", ".join(others[:5]) + (f" +{len(others) - 5}" if len(others) > 5 else "")
+            print(f"⚠ {source} | Hits: {hits} | {first} → {last}" + (f" | {shown}" if shown else ""))
+
+def generate_report(rules=DEFAULT_RULES, threshold=5, limit=None):
     print("\n🔐 Security Threat Report")
     print("-" * 30)
     for ip, count in ip_attempts.items():
-        if count >= 5:
+        if count >= threshold:
             print(f"⚠ Suspicious IP Detected: {ip} | Attempts: {count}")
+    for rule in rules:
+        if rule.name in source_counts:
+            counts = source_counts[rule.name]
+            for bits in SourceCounts.LEVELS:
+                for count, key in counts.top(bits, threshold, limit):
+                    if rule.name == "failed_password" and bits == 32:
+                        print(f"⚠ Suspicious IP Detected: {format_source(key)} | Attempts: {count}")
+                    else:
+                        print(f"⚠ {rule.title}: {format_source(key, bits)} | Hits: {count}")
+            continue
+        if rule.name == "failed_password":
+            continue  # reported above
+        for key, count in threat_counts[rule.name].items():
+            if count >= threshold:
+                print(f"⚠ {rule.title}: {key} | Hits: {count}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report IPs with repeated failed SSH logins")
+    parser.add_argument("log", nargs="?", default=LOG_FILE)
+    parser.add_argument("--parallel", action="store_true",
+                        help="scan memory-mapped chunks on a process pool")
+    parser.add_argument("--legacy", action="store_true",
+                        help="line-by-line regex scan (failed passwords only)")
+    parser.add_argument("--rules", metavar="JSON", help="threat rules to use instead of the defaults")
+    parser.add_argument("--threshold", type=int, default=5, help="hits needed to report a source")
+    parser.add_argument("--counter", choices=["dict", "exact", "sketch"], default="dict",
+                        help="exact: packed IPv4 arrays with /24 and /16 rollups; sketch: the "
+                             "same in fixed memory (Count-Min + top-k)")
+    parser.add_argument("--top", type=int, help="report at most this many sources per rule and level")
+    parser.add_argument("--incremental", action="store_true",
+                        help="include rotated and compressed logs, resuming from the last run's checkpoint")
+    parser.add_argument("--checkpoint", metavar="JSON", help="checkpoint file for --incremental "
+                                                             "(default: .<log>.checkpoint.json)")
+    parser.add_argument("--store", metavar="DB",
+                        help="also save new failure events to this SQLite file (implies --incremental)")
+    parser.add_argument("--query", metavar="DB", help="report from a --store database instead of a log")
+    parser.add_argument("--by", choices=list(GROUPINGS), default="ip", help="query grouping")
+    parser.add_argument("--since", type=parse_time, help="query start: 7d, 12h, epoch or ISO 8601")
+    parser.add_argument("--until", type=parse_time, help="query end")
+    parser.add_argument("--rule", action="append", help="query only these rule names")
+    parser.add_argument("--ip", type=ipaddress.IPv4Address, help="query one source IP")
+    parser.add_argument("--user", help="query one username")
+    parser.add_argument("--format", choices=["table", "json", "csv"], default="table")
+    parser.add_argument("--follow", action="store_true",
+                        help="tail the log and alert on --threshold hits within --window seconds")
+    parser.add_argument("--window", type=float, default=60.0)
+    parser.add_argument("--from-start", action="store_true",
+                        help="with --follow, replay the existing log before tailing")
+    parser.add_argument("--generate", metavar="SIZE",
+                        help="write a synthetic auth log of this size (e.g. 100MB) to LOG and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--attack-rate", type=float, default=0.02,
+                        help="fraction of generated lines that are attacks")
+    parser.add_argument("--benchmark", nargs="*", metavar="SIZE",
+                        help="time every scan mode on generated logs (default: 100MB 1GB 10GB)")
+    parser.add_argument("--modes", nargs="+", choices=BENCH_MODES, default=list(BENCH_MODES))
+    parser.add_argument("--bench-dir", default=".", help="where benchmark logs are generated")
+    parser.add_argument("--workers", type=int, help="pool size (default: all cores)")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE >> 20)
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    analyze_logs()
-    generate_report()
+    args = parse_args()
+    rules = load_rules(args.rules) if args.rules else DEFAULT_RULES
+    if args.counter != "dict" and not args.legacy:
+        use_counters(args.counter, rules)
+    if args.generate:
+        lines = generate_log(args.log, parse_size(args.generate), args.seed, args.attack_rate)
+        print(f"📝 Wrote {lines:,} lines to {args.log}")
+        raise SystemExit
+    if args.benchmark is not None:
+        benchmark(args.benchmark or ["100MB", "1GB", "10GB"], args.modes, args.bench_dir,
+                  args.seed, args.workers)
+        raise SystemExit
+    if args.query:
+        try:
+            results = query_events(args.query, args.by, args.threshold, args.since, args.until,
+                                   args.rule, args.ip, args.user, args.top)
+        except sqlite3.Error as error:
+            raise SystemExit(f"❌ Can't query event store {args.query}: {error}")
+        write_results(results, args.format)
+        raise SystemExit
+    if not (args.follow or args.incremental or args.store or os.path.exists(args.log)):
+        raise SystemExit(f"❌ Log file not found: {args.log} (try --generate 100MB to make one)")
+    if args.follow:
+        follow_logs(args.log, rules, args.threshold, args.window, from_start=args.from_start)
+    elif args.store:
+        store_events(args.log, args.store, rules)
+    elif args.incremental:
+        analyze_logs_incremental(args.log, rules, args.checkpoint)
+    elif args.legacy:
+        analyze_logs(args.log)
+    elif args.parallel:
+        analyze_logs_parallel(args.log, args.workers, args.chunk_mb << 20, rules)
+    else:
+        analyze_logs_fast(args.log, rules)
+    if not args.follow:
+        generate_report(rules, args.threshold, args.top)
@@ -2,47 +2,633 @@
 # BATTLE ROYALE 3D – REFINED EDITION
 # ===============================
 
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
 import numpy as np
-import math, random, time
+import math, random, time, ctypes, argparse, os, io, json, struct, zlib, socket, asyncio
+from collections import Counter
 from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pygame
+    from pygame.locals import *
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+except ImportError:  # headless simulation only needs numpy
+    pygame = None
 
 WIDTH, HEIGHT = 1400, 800
 FPS = 60
 
+# -------------------------------
+# SIMULATION CONSTANTS
+# -------------------------------
+TICK_RATE = 60              # simulation ticks per second, independent of FPS
+TICK_DT = 1 / TICK_RATE
+MAX_CATCHUP_TICKS = 5       # drop time rather than spiral when a frame is slow
+
+# Speeds in units/s, tuned to match the old per-frame feel at 60 FPS
+PLAYER_SPEED = 66.7
+AI_SPEED = 1.33
+BULLET_SPEED = 54.0
+BULLET_LIFE = 0.15
+BULLET_DAMAGE = 15
+HIT_RADIUS = 0.8
+
+# Bots re-plan at 10 Hz, staggered so only a tenth of them think per tick
+AI_DECISION_TICKS = TICK_RATE // 10
+AI_FIRE_CHANCE = 1 - (1 - 0.02) ** AI_DECISION_TICKS  # same rate as 2% per tick
+AI_FIRE_RANGE = BULLET_SPEED * BULLET_LIFE
+AI_SIGHT_CELL = 16.0        # spatial index cell for target search
+AI_KEEP_DISTANCE = 4.0      # circle the target instead of walking into it
+AI_STEERING = 0.2           # fraction of the way to the desired velocity per tick
+
+# Zone phases: (wait s, shrink s, radius at end of shrink)
+ZONE_START_RADIUS = 35.0
+ZONE_PHASES = [(30, 30, 25), (20, 30, 15), (20, 30, 8), (15, 20, 3), (10, 15, 0)]
+ZONE_DAMAGE = 5.0           # health per second outside the zone
+
+# LAN play
+NET_PORT = 47777
+NET_SNAPSHOT_TICKS = 3      # 20 Hz state updates
+NET_QUANT = 64              # positions sent in 1/64 unit steps
+NET_INTERP_TICKS = 6        # clients render 100 ms in the past
+NET_HISTORY = 64            # snapshots kept as delta baselines
+NET_TIMEOUT = 5.0           # seconds of silence before a client's bot takes over
+MAX_MATCH_TICKS = 5 * 60 * TICK_RATE
+SNAPSHOT_EVERY = 5 * TICK_RATE  # replay keyframe interval
+
+BULLET_CAPACITY = 8192
+PARTICLE_CAPACITY = 16384
+PARTICLE_LIFE = 0.6
+PARTICLE_GRAVITY = 12.0
+HIT_SPARKS = 6
+DEATH_SPARKS = 48
+
+PLAYER_COLORS = [(0,1,0),(1,0,0),(0,0.5,1),(1,1,0)]
+PLAYER_NAMES = ["VIPER","PHOENIX","FROST","REAPER"]
+
 # -------------------------------
 # DATA CLASSES
 # -------------------------------
 @dataclass
-class Player:
-    pos: np.ndarray
-    vel: np.ndarray
-    color: tuple
-    name: str
-    health: float = 100
-    ammo: int = 60
-    angle: float = 0
-    alive: bool = True
-    shield: float = 0
-    kills: int = 0
-    grounded: bool = True
+class PlayerInput:
+    forward: int = 0        # -1 back, 0 idle, 1 forward
+    turn: float = 0.0       # radians to add to the heading this tick
+    fire: bool = False
 
-@dataclass
-class Bullet:
-    pos: np.ndarray
-    vel: np.ndarray
-    owner: str
-    life: float = 2.5
+# -------------------------------
+# SPATIAL HASH
+# -------------------------------
+class SpatialHash:
+    """Uniform grid over the XZ plane, rebuilt from scratch every tick.
 
-@dataclass
-class Particle:
-    pos: np.ndarray
-    vel: np.ndarray
-    color: tuple
-    life: float
+    Entries outside [-bound, bound] are clamped into the edge cells, which
+    can only add candidates, never lose them.
+    """
+    def __init__(self, cell_size, bound):
+        self.cell_size = cell_size
+        self.bound = bound
+        self.dim = max(1, int(math.ceil(2 * bound / cell_size)))
+        self.order = np.empty(0, dtype=np.intp)
+        self.keys = np.empty(0, dtype=np.intp)
+
+    def cells(self, pos):
+        c = np.floor((pos[:, [0, 2]] + self.bound) / self.cell_size).astype(np.intp)
+        return np.clip(c, 0, self.dim - 1, out=c)
+
+    def build(self, pos):
+        c = self.cells(pos)
+        keys = c[:, 0] * self.dim + c[:, 1]
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def candidates(self, pos):
+        """(query, entry) index pairs for entries in the 3x3 cells around each query"""
+        c = self.cells(pos)
+        queries, entries = [], []
+        for dx in (-1, 0, 1):
+            for dz in (-1, 0, 1):
+                cx, cz = c[:, 0] + dx, c[:, 1] + dz
+                inside = (cx >= 0) & (cx < self.dim) & (cz >= 0) & (cz < self.dim)
+                q = np.flatnonzero(inside)
+                key = cx[inside] * self.dim + cz[inside]
+                lo = np.searchsorted(self.keys, key, 'left')
+                counts = np.searchsorted(self.keys, key, 'right') - lo
+                total = counts.sum()
+                if not total:
+                    continue
+                # Expand each [lo, lo+count) bucket range into flat entry slots
+                first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                queries.append(np.repeat(q, counts))
+                entries.append(self.order[first + np.arange(total)])
+        if not queries:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(queries), np.concatenate(entries)
+
+# -------------------------------
+# OBJECT POOLS
+# -------------------------------
+class Pool:
+    """Fixed-capacity structure-of-arrays slots with a free-list.
+
+    Fields are preallocated once; alloc() pops slot indices off a free
+    stack and release() pushes them back, so steady-state play allocates
+    nothing. When the pool is full, alloc() returns fewer slots.
+    """
+    def __init__(self, capacity, **fields):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        for name, (shape, dtype) in fields.items():
+            setattr(self, name, np.zeros((capacity, *shape), dtype=dtype))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.free = np.arange(capacity)[::-1].copy()
+        self.top = capacity  # free[:top] are the free slots, next one at the top
+
+    def __len__(self):
+        return self.capacity - self.top
+
+    def live(self):
+        return np.flatnonzero(self.active)
+
+    def alloc(self, n):
+        n = min(n, self.top)
+        slots = self.free[self.top - n:self.top][::-1].copy()
+        self.top -= n
+        self.active[slots] = True
+        return slots
+
+    def release(self, slots):
+        self.active[slots] = False
+        self.free[self.top:self.top + len(slots)] = slots
+        self.top += len(slots)
+
+    def state(self):
+        """Live slots and the free stack; enough to rebuild the pool exactly"""
+        live = self.live()
+        # The free stack is mostly runs of consecutive slots, so its deltas compress well
+        free = np.diff(self.free[:self.top], prepend=0).astype(np.int32)
+        state = {"slots": live.astype(np.int32), "free": free}
+        state.update((name, getattr(self, name)[live]) for name in self.fields)
+        return state
+
+    def load_state(self, state):
+        live = state["slots"]
+        self.active[:] = False
+        self.active[live] = True
+        self.top = len(state["free"])
+        self.free[:self.top] = np.cumsum(state["free"])
+        for name in self.fields:
+            getattr(self, name)[live] = state[name]
+
+# -------------------------------
+# WORLD STATE
+# -------------------------------
+class World:
+    """Game state as structure-of-arrays buffers, advanced in fixed ticks.
+
+    Player i lives at index i of every p_* array; bullets and particles are
+    slots in fixed-capacity pools. Players flagged in p_human are driven by
+    apply_input instead of the AI; with human=False player 0 is a bot too,
+    which is how headless matches run. Cosmetic particles draw from their
+    own RNG stream, so switching effects off never changes the outcome.
+    """
+    PHASES = ("ai", "bullets", "collisions", "zone", "effects")
+
+    def __init__(self, num_players=4, seed=None, human=True, effects=True):
+        self.rng, self.fx_rng = [np.random.default_rng(s)
+                                 for s in np.random.SeedSequence(seed).spawn(2)]
+        self.human = human
+        self.effects = effects
+        self.tick = 0
+        self.timings = dict.fromkeys(self.PHASES, 0.0)
+
+        n = num_players
+        self.names = [PLAYER_NAMES[i] if i < len(PLAYER_NAMES) else f"BOT{i}" for i in range(n)]
+        self.p_color = np.array([PLAYER_COLORS[i % len(PLAYER_COLORS)] for i in range(n)],
+                                dtype=np.float32)
+        angle = np.arange(n) * (2*math.pi / n)
+        radius = np.full(n, 15.0)
+        if n > 8:
+            # Too many for a ring: scatter uniformly over most of the zone
+            angle = self.rng.uniform(0, 2*math.pi, n)
+            radius = ZONE_START_RADIUS * 0.8 * np.sqrt(self.rng.random(n))
+        self.p_pos = np.stack([np.cos(angle)*radius, np.full(n, 0.5), np.sin(angle)*radius], axis=1)
+        self.p_vel = np.zeros((n, 3))
+        self.p_angle = angle + math.pi
+        self.p_health = np.full(n, 100.0)
+        self.p_ammo = np.full(n, 60)
+        self.p_alive = np.ones(n, dtype=bool)
+        self.p_shield = np.zeros(n)
+        self.p_kills = np.zeros(n, dtype=int)
+        self.p_human = np.zeros(n, dtype=bool)
+        self.p_human[0] = human
+        self.p_last_hit = np.full(n, -1)    # who to credit if this player dies
+        self.p_target = np.full(n, -1)      # bot's current target, -1 for none
+        self.p_strafe = self.rng.choice([-1.0, 1.0], n)
+
+        self.zone_center = np.zeros(2)
+        self.zone_radius = ZONE_START_RADIUS
+        self.zone_from = np.array([0.0, 0.0, ZONE_START_RADIUS])  # x, z, radius
+        self.zone_to = self.zone_from.copy()
+        self.zone_phase = -1
+
+        self.bullets = Pool(BULLET_CAPACITY, pos=((3,), float), vel=((3,), float),
+                            life=((), float), owner=((), int))
+        self.particles = Pool(PARTICLE_CAPACITY, pos=((3,), np.float32), vel=((3,), np.float32),
+                              color=((3,), np.float32), life=((), np.float32))
+
+    @property
+    def num_players(self):
+        return len(self.p_pos)
+
+    @property
+    def finished(self):
+        return np.count_nonzero(self.p_alive) <= 1 or self.tick >= MAX_MATCH_TICKS
+
+    @property
+    def winner(self):
+        alive = np.flatnonzero(self.p_alive)
+        return int(alive[0]) if len(alive) == 1 else None
+
+    # ---------------------------
+    def shoot(self, shooters, targets):
+        """Fire one bullet from each shooter index towards the matching target"""
+        shooters = np.asarray(shooters, dtype=int)
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        armed = self.p_ammo[shooters] > 0
+        shooters, targets = shooters[armed], targets[armed]
+
+        direction = targets - self.p_pos[shooters]
+        direction[:, 1] = 0
+        length = np.linalg.norm(direction, axis=1)
+        ok = length > 0
+        shooters, direction = shooters[ok], direction[ok] / length[ok, None]
+
+        b = self.bullets
+        slots = b.alloc(len(shooters))
+        shooters, direction = shooters[:len(slots)], direction[:len(slots)]
+        b.pos[slots] = self.p_pos[shooters] + direction
+        b.vel[slots] = direction * BULLET_SPEED
+        b.life[slots] = BULLET_LIFE
+        b.owner[slots] = shooters
+        self.p_ammo[shooters] -= 1
+
+    def emit(self, origins, colors, count, speed):
+        """Burst `count` particles from each origin in the matching color"""
+        if not self.effects or not len(origins):
+            return
+        pt = self.particles
+        slots = pt.alloc(len(origins) * count)
+        n = len(slots)
+        direction = self.fx_rng.normal(size=(n, 3)).astype(np.float32)
+        direction[:, 1] = np.abs(direction[:, 1])
+        pt.pos[slots] = np.repeat(origins, count, axis=0)[:n]
+        pt.vel[slots] = direction * (speed * self.fx_rng.random((n, 1), dtype=np.float32))
+        pt.color[slots] = np.repeat(colors, count, axis=0)[:n]
+        pt.life[slots] = PARTICLE_LIFE * (0.5 + 0.5 * self.fx_rng.random(n, dtype=np.float32))
+
+    # ---------------------------
+    def snapshot(self):
+        """Full simulation state, RNGs and pools included, as compressed npz bytes"""
+        state = {}
+        for key, value in vars(self).items():
+            if isinstance(value, np.random.Generator):
+                state[key] = np.array(json.dumps(value.bit_generator.state))
+            elif isinstance(value, Pool):
+                state.update((f"{key}.{k}", v) for k, v in value.state().items())
+            elif isinstance(value, (np.ndarray, int, float)) and not isinstance(value, bool):
+                state[key] = value  # bools are config (human, effects), not state
+        buf = io.BytesIO()
+        np.savez_compressed(buf, **state)
+        return buf.getvalue()
+
+    def restore(self, data):
+        pools = {}
+        with np.load(io.BytesIO(data)) as state:
+            for key in state.files:
+                value = state[key]
+                if "." in key:
+                    name, field = key.split(".", 1)
+                    pools.setdefault(name, {})[field] = value
+                    continue
+                current = getattr(self, key)
+                if isinstance(current, np.random.Generator):
+                    current.bit_generator.state = json.loads(value.item())
+                elif isinstance(current, np.ndarray):
+                    setattr(self, key, value)
+                else:
+                    setattr(self, key, value.item())
+        for name, pool_state in pools.items():
+            getattr(self, name).load_state(pool_state)
+
+    def heading(self, i):
+        return np.array([math.cos(self.p_angle[i]), 0, math.sin(self.p_angle[i])])
+
+    # ---------------------------
+    def step(self, inp=None):
+        """Advance the world by exactly one tick"""
+        t0 = time.perf_counter()
+        if inp is not None and self.human:
+            self.apply_input(0, inp)
+        self.update_ai()
+        t1 = time.perf_counter()
+        live = self.move_bullets()
+        t2 = time.perf_counter()
+        self.resolve_hits(live)
+        t3 = time.perf_counter()
+        self.update_zone()
+        self.resolve_deaths()
+        t4 = time.perf_counter()
+        if self.effects:
+            self.update_particles()
+        t5 = time.perf_counter()
+        self.tick += 1
+
+        self.timings["ai"] += t1 - t0
+        self.timings["bullets"] += t2 - t1
+        self.timings["collisions"] += t3 - t2
+        self.timings["zone"] += t4 - t3
+        self.timings["effects"] += t5 - t4
+
+    def apply_input(self, i, inp):
+        self.p_angle[i] += inp.turn
+        if not self.p_alive[i]:
+            return
+        if inp.forward:
+            self.p_pos[i] += self.heading(i) * (inp.forward * PLAYER_SPEED * TICK_DT)
+        if inp.fire:
+            self.shoot([i], self.p_pos[i] + self.heading(i) * 10)
+
+    def nearest_enemies(self, bots):
+        """Nearest living opponent of each bot, or -1 if none is left.
+
+        Uses a spatial hash over the survivors. The 3x3 cell neighbourhood
+        only guarantees everyone within one cell size, so bots whose best
+        candidate is farther than that (or who have none) fall back to a
+        scan of everyone.
+        """
+        alive = np.flatnonzero(self.p_alive)
+        target = np.full(len(bots), -1)
+        if len(alive) < 2:
+            return target
+
+        grid = SpatialHash(AI_SIGHT_CELL, ZONE_START_RADIUS)
+        grid.build(self.p_pos[alive])
+        q, e = grid.candidates(self.p_pos[bots])
+        other = alive[e]
+        keep = other != bots[q]
+        q, other = q[keep], other[keep]
+        flat = self.p_pos[:, [0, 2]]
+        d = flat[bots[q]] - flat[other]
+        dist2 = np.einsum('ij,ij->i', d, d)
+        order = np.lexsort((dist2, q))
+        q, other, dist2 = q[order], other[order], dist2[order]
+        first = np.ones(len(q), dtype=bool)
+        first[1:] = q[1:] != q[:-1]
+        near = first & (dist2 <= AI_SIGHT_CELL ** 2)
+        target[q[near]] = other[near]
+
+        lonely = np.flatnonzero(target < 0)
+        if len(lonely):
+            d = flat[bots[lonely], None, :] - flat[None, alive, :]
+            dist2 = np.einsum('bak,bak->ba', d, d)
+            dist2[bots[lonely, None] == alive[None, :]] = np.inf
+            target[lonely] = alive[dist2.argmin(axis=1)]
+        return target
+
+    def update_ai(self):
+        bots = np.flatnonzero(self.p_alive & ~self.p_human)
+        if not len(bots):
+            return
+
+        # Staggered decisions: each bot re-targets and considers firing at 10 Hz
+        deciding = bots[(bots + self.tick) % AI_DECISION_TICKS == 0]
+        if len(deciding):
+            self.p_target[deciding] = self.nearest_enemies(deciding)
+            target = self.p_target[deciding]
+            has = target >= 0
+            gap = np.linalg.norm(self.p_pos[target] - self.p_pos[deciding], axis=1)
+            firing = has & (gap < AI_FIRE_RANGE) & (self.rng.random(len(deciding)) < AI_FIRE_CHANCE)
+            self.shoot(deciding[firing], self.p_pos[target[firing]])
+
+        # Vectorized steering every tick: close in on the target, circle it
+        # once near, and head for the zone centre when outside or idle
+        target = self.p_target[bots]
+        hunting = (target >= 0) & self.p_alive[np.maximum(target, 0)]
+        goal = np.empty((len(bots), 3))
+        goal[:, [0, 2]] = self.zone_center
+        goal[hunting] = self.p_pos[target[hunting]]
+
+        to_goal = goal - self.p_pos[bots]
+        to_goal[:, 1] = 0
+        dist = np.linalg.norm(to_goal, axis=1, keepdims=True)
+        desired = to_goal / np.maximum(dist, 1e-9)
+
+        close = hunting & (dist[:, 0] < AI_KEEP_DISTANCE)
+        side = np.stack([-desired[:, 2], np.zeros(len(bots)), desired[:, 0]], axis=1)
+        desired[close] = side[close] * self.p_strafe[bots[close], None]
+
+        outside = ~self.in_zone(bots)
+        if outside.any():
+            home = np.zeros((np.count_nonzero(outside), 3))
+            home[:, [0, 2]] = self.zone_center - self.p_pos[bots[outside]][:, [0, 2]]
+            desired[outside] = home / np.maximum(np.linalg.norm(home, axis=1, keepdims=True), 1e-9)
+        desired[~hunting & (dist[:, 0] < 1)] = 0  # idle at the centre
+
+        vel = self.p_vel[bots]
+        vel += (desired * AI_SPEED - vel) * AI_STEERING
+        self.p_vel[bots] = vel
+        self.p_pos[bots] += vel * TICK_DT
+        moving = np.linalg.norm(vel, axis=1) > 1e-6
+        self.p_angle[bots[moving]] = np.arctan2(vel[moving, 2], vel[moving, 0])
+
+    # ---------------------------
+    def in_zone(self, players):
+        d = self.p_pos[players][:, [0, 2]] - self.zone_center
+        return np.einsum('ij,ij->i', d, d) <= self.zone_radius**2
+
+    def update_zone(self):
+        """Advance the shrink schedule and damage everyone outside the circle"""
+        t = self.tick * TICK_DT
+        start = 0.0
+        for phase, (wait, shrink, radius) in enumerate(ZONE_PHASES):
+            if t < start + wait + shrink:
+                break
+            start += wait + shrink
+        else:
+            phase, wait, shrink, radius = len(ZONE_PHASES), 0, 1, self.zone_to[2]
+
+        if phase != self.zone_phase:
+            # New circle inside the old one, at a random offset
+            self.zone_phase = phase
+            self.zone_from = np.array([*self.zone_center, self.zone_radius])
+            slack = max(self.zone_radius - radius, 0)
+            angle = self.rng.uniform(0, 2*math.pi)
+            offset = slack * math.sqrt(self.rng.random())
+            self.zone_to = np.array([self.zone_center[0] + math.cos(angle) * offset,
+                                     self.zone_center[1] + math.sin(angle) * offset,
+                                     radius])
+
+        f = min(max((t - start - wait) / shrink, 0.0), 1.0)
+        x, z, r = self.zone_from + (self.zone_to - self.zone_from) * f
+        self.zone_center = np.array([x, z])
+        self.zone_radius = float(r)
+
+        alive = np.flatnonzero(self.p_alive)
+        outside = alive[~self.in_zone(alive)]
+        self.p_health[outside] -= ZONE_DAMAGE * TICK_DT
+
+    def resolve_deaths(self):
+        died = self.p_alive & (self.p_health <= 0)
+        if not died.any():
+            return
+        credited = self.p_last_hit[died]
+        np.add.at(self.p_kills, credited[credited >= 0], 1)
+        self.p_alive[died] = False
+        self.emit(self.p_pos[died], self.p_color[died], DEATH_SPARKS, 10.0)
+
+    def move_bullets(self):
+        """Advance and age bullets, free expired ones; returns the live slots"""
+        b = self.bullets
+        live = b.live()
+        b.pos[live] += b.vel[live] * TICK_DT
+        b.life[live] -= TICK_DT
+        expired = b.life[live] <= 0
+        b.release(live[expired])
+        return live[~expired]
+
+    def resolve_hits(self, live):
+        if len(live):
+            bullets, victims = self.find_hits(live)
+            self.apply_hits(bullets, victims)
+            self.bullets.release(bullets)
+
+    def update_particles(self):
+        pt = self.particles
+        live = pt.live()
+        if not len(live):
+            return
+        pt.vel[live, 1] -= PARTICLE_GRAVITY * TICK_DT
+        pt.pos[live] += pt.vel[live] * TICK_DT
+        below = live[pt.pos[live, 1] < 0]
+        pt.pos[below, 1] = 0
+        pt.vel[below] *= (0.6, -0.4, 0.6)  # bounce off the ground
+        pt.life[live] -= TICK_DT
+        pt.release(live[pt.life[live] <= 0])
+
+    def find_hits(self, shots):
+        """Indices of bullets that hit someone this tick and who they hit.
+
+        Players are bucketed in a spatial hash; each live bullet is only
+        tested against players in its neighbouring cells, and hits the
+        closest one if several overlap.
+        """
+        grid = SpatialHash(2 * HIT_RADIUS, ZONE_START_RADIUS + HIT_RADIUS)
+        alive = np.flatnonzero(self.p_alive)
+        grid.build(self.p_pos[alive])
+
+        b = self.bullets
+        q, e = grid.candidates(b.pos[shots])
+        bullets, victims = shots[q], alive[e]
+
+        d = b.pos[bullets] - self.p_pos[victims]
+        dist2 = np.einsum('ij,ij->i', d, d)
+        hit = (dist2 < HIT_RADIUS**2) & (b.owner[bullets] != victims)
+        bullets, victims, dist2 = bullets[hit], victims[hit], dist2[hit]
+
+        # One victim per bullet: keep the nearest
+        order = np.lexsort((dist2, bullets))
+        bullets, victims = bullets[order], victims[order]
+        first = np.ones(len(bullets), dtype=bool)
+        first[1:] = bullets[1:] != bullets[:-1]
+        return bullets[first], victims[first]
+
+    def apply_hits(self, bullets, victims):
+        if not len(bullets):
+            return
+        self.p_health -= np.bincount(victims, minlength=self.num_players) * BULLET_DAMAGE
+        self.emit(self.bullets.pos[bullets], self.p_color[victims], HIT_SPARKS, 6.0)
+        # The last bullet to land on a player gets the kill, even if the zone finishes them
+        self.p_last_hit[victims] = self.bullets.owner[bullets]
+
+# -------------------------------
+# REPLAY
+# -------------------------------
+class Replay:
+    """Seed, per-tick local input and periodic keyframes of one match.
+
+    The world only depends on its seed and player 0's input, so replaying
+    the inputs re-simulates the match exactly. Keyframes let seek() jump
+    anywhere by restoring the nearest earlier snapshot and simulating the
+    remaining few seconds headless.
+    """
+    MAGIC = b"BRRP"
+    VERSION = 3
+    HEADER = struct.Struct("<4sHHHHQII")
+    INPUT = np.dtype([("forward", "i1"), ("turn", "<f4"), ("fire", "?")])
+
+    def __init__(self, seed, num_players, human=True, snapshot_every=SNAPSHOT_EVERY):
+        self.seed = seed
+        self.num_players = num_players
+        self.human = human
+        self.snapshot_every = snapshot_every
+        self.inputs = np.zeros(1024, dtype=self.INPUT)
+        self.ticks = 0
+        self.snapshots = {}
+
+    def record(self, world, inp):
+        """Log the input for the tick about to run; returns it as it will replay"""
+        if world.tick % self.snapshot_every == 0:
+            self.snapshots[world.tick] = world.snapshot()
+        if self.ticks == len(self.inputs):
+            self.inputs = np.resize(self.inputs, 2 * len(self.inputs))
+        self.inputs[self.ticks] = (inp.forward, inp.turn, inp.fire)
+        self.ticks += 1
+        return self.input_at(self.ticks - 1)
+
+    def input_at(self, tick):
+        forward, turn, fire = self.inputs[tick].item()
+        return PlayerInput(forward, turn, fire)
+
+    def seek(self, tick):
+        """A world positioned just before `tick` runs"""
+        tick = min(max(int(tick), 0), self.ticks)
+        world = World(self.num_players, seed=self.seed, human=self.human)
+        keyframes = [t for t in self.snapshots if t <= tick]
+        if keyframes:
+            world.restore(self.snapshots[max(keyframes)])
+        while world.tick < tick:
+            world.step(self.input_at(world.tick))
+        return world
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, TICK_RATE, self.num_players,
+                                     int(self.human), self.seed, self.snapshot_every, self.ticks))
+            inputs = zlib.compress(self.inputs[:self.ticks].tobytes(), 9)
+            f.write(struct.pack("<II", len(inputs), len(self.snapshots)))
+            f.write(inputs)
+            for tick, data in sorted(self.snapshots.items()):
+                f.write(struct.pack("<II", tick, len(data)))
+                f.write(data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, tick_rate, num_players, human, seed, every, ticks = \
+                cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f"{path} is not a version {cls.VERSION} replay")
+            if tick_rate != TICK_RATE:
+                raise ValueError(f"{path} was recorded at {tick_rate} ticks/s, not {TICK_RATE}")
+            replay = cls(seed, num_players, bool(human), every)
+            size, count = struct.unpack("<II", f.read(8))
+            replay.inputs = np.frombuffer(zlib.decompress(f.read(size)), dtype=cls.INPUT).copy()
+            replay.ticks = ticks
+            for _ in range(count):
+                tick, size = struct.unpack("<II", f.read(8))
+                replay.snapshots[tick] = f.read(size)
+        return replay
 
 # -------------------------------
 # CAMERA
@@ -52,20 +638,156 @@ class Camera:
         self.pos = np.array([0.0, 18.0, 28.0])
         self.target = np.zeros(3)
 
-    def update(self, target):
+    def update(self, target, t):
+        """Ease towards target and orbit; t is match time so replays match"""
         self.target = self.target * 0.9 + target * 0.1
-        angle = time.time() * 0.2
+        angle = t * 0.2
         self.pos = self.target + np.array([
             math.cos(angle) * 28,
             18,
             math.sin(angle) * 28
         ])
 
+# -------------------------------
+# RENDERER
+# -------------------------------
+def sphere_mesh(radius, slices, stacks):
+    """Latitude/longitude sphere as (vertices (V, 3), triangle indices (T*3,))"""
+    phi = np.linspace(0, math.pi, stacks + 1)
+    theta = np.linspace(0, 2*math.pi, slices + 1)
+    P, T = np.meshgrid(phi, theta, indexing='ij')
+    vertices = np.stack([np.sin(P)*np.cos(T), np.cos(P), np.sin(P)*np.sin(T)], axis=-1) * radius
+
+    grid = np.arange((stacks + 1) * (slices + 1)).reshape(stacks + 1, slices + 1)
+    a, b = grid[:-1, :-1], grid[1:, :-1]
+    c, d = grid[1:, 1:], grid[:-1, 1:]
+    indices = np.stack([a, b, c, a, c, d], axis=-1).ravel()
+    return vertices.reshape(-1, 3).astype(np.float32), indices.astype(np.uint32)
+
+
+class Renderer:
+    """Retained-mode renderer with a fixed, small number of draw calls.
+
+    Ground, zone ring and sphere meshes are built once; the zone is scaled
+    with the modelview matrix, and all players and all bullets are each
+    streamed as a single vertex array per frame. Only uses GL 1.5 buffer
+    objects, so it runs on Mesa's software rasterizer.
+    """
+    ZONE_SEGMENTS = 60
+
+    def __init__(self):
+        self.sphere, self.sphere_indices = sphere_mesh(0.6, 12, 8)
+        self.player_elements = glGenBuffers(1)
+        self.player_capacity = 0
+
+        ground = np.array([[-50,0,-50],[50,0,-50],[50,0,50],[-50,0,50]], dtype=np.float32)
+        self.ground = self._static_buffer(ground)
+
+        a = np.arange(self.ZONE_SEGMENTS) / self.ZONE_SEGMENTS * 2*math.pi
+        ring = np.stack([np.cos(a), np.full_like(a, 0.1), np.sin(a)], axis=1).astype(np.float32)
+        self.ring = self._static_buffer(ring)
+
+        self.stream = glGenBuffers(1)
+        self.draw_calls = 0
+
+    @staticmethod
+    def _static_buffer(vertices):
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return vbo, len(vertices)
+
+    def _draw_static(self, buffer, mode):
+        vbo, count = buffer
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glVertexPointer(3, GL_FLOAT, 0, ctypes.c_void_p(0))
+        glDrawArrays(mode, 0, count)
+        self.draw_calls += 1
+
+    def _draw_stream(self, data, mode, colored, elements=0):
+        """Upload one frame's worth of vertices (xyz or xyzrgb rows) and draw them.
+
+        With `elements`, draws that many indices from the bound element buffer.
+        """
+        glBindBuffer(GL_ARRAY_BUFFER, self.stream)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        stride = data.shape[1] * 4
+        glVertexPointer(3, GL_FLOAT, stride, ctypes.c_void_p(0))
+        if colored:
+            glEnableClientState(GL_COLOR_ARRAY)
+            glColorPointer(3, GL_FLOAT, stride, ctypes.c_void_p(12))
+        if elements:
+            glDrawElements(mode, elements, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        else:
+            glDrawArrays(mode, 0, len(data))
+        if colored:
+            glDisableClientState(GL_COLOR_ARRAY)
+        self.draw_calls += 1
+
+    def _bind_player_elements(self, n):
+        """Element buffer holding the sphere indices repeated for n players"""
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.player_elements)
+        if n > self.player_capacity:
+            # Grow geometrically so a lobby only triggers a handful of rebuilds
+            self.player_capacity = max(n, 2 * self.player_capacity, 16)
+            offsets = np.arange(self.player_capacity, dtype=np.uint32) * len(self.sphere)
+            indices = (self.sphere_indices[None, :] + offsets[:, None]).ravel()
+            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        return n * len(self.sphere_indices)
+
+    def draw(self, world):
+        self.draw_calls = 0
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        # Ground
+        glColor3f(0.4,0.35,0.3)
+        self._draw_static(self.ground, GL_TRIANGLE_FAN)
+
+        # Zone: unit ring moved and scaled to the current circle
+        glColor3f(1,0,0)
+        glPushMatrix()
+        glTranslatef(world.zone_center[0], 0, world.zone_center[1])
+        glScalef(world.zone_radius, 1, world.zone_radius)
+        self._draw_static(self.ring, GL_LINE_LOOP)
+        glPopMatrix()
+
+        # Players: every sphere in one interleaved position/color array
+        alive = np.flatnonzero(world.p_alive)
+        if len(alive):
+            n, v = len(alive), len(self.sphere)
+            data = np.empty((n, v, 6), dtype=np.float32)
+            data[:, :, :3] = self.sphere[None] + world.p_pos[alive, None, :]
+            data[:, :, 3:] = world.p_color[alive, None, :]
+            count = self._bind_player_elements(n)
+            self._draw_stream(data.reshape(-1, 6), GL_TRIANGLES, colored=True, elements=count)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+        # Bullets
+        bullets = world.bullets.live()
+        if len(bullets):
+            glPointSize(6)
+            glColor3f(1,1,0)
+            self._draw_stream(world.bullets.pos[bullets].astype(np.float32), GL_POINTS, colored=False)
+
+        # Particles, fading out with remaining life
+        particles = world.particles.live()
+        if len(particles):
+            pt = world.particles
+            data = np.empty((len(particles), 6), dtype=np.float32)
+            data[:, :3] = pt.pos[particles]
+            data[:, 3:] = pt.color[particles] * np.minimum(pt.life[particles] / 0.3, 1)[:, None]
+            glPointSize(3)
+            self._draw_stream(data, GL_POINTS, colored=True)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
 # -------------------------------
 # MAIN GAME
 # -------------------------------
 class BattleRoyale3D:
-    def __init__(self):
+    def __init__(self, seed=None, record=None, replay=None, connect=None):
         pygame.init()
         pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL)
         pygame.display.set_caption("Battle Royale 3D – Refined Edition")
@@ -77,76 +799,64 @@ class BattleRoyale3D:
 
         self.clock = pygame.time.Clock()
         self.camera = Camera()
+        self.renderer = Renderer()
 
-        self.players = self.spawn_players()
-        self.bullets = []
-        self.particles = []
-
-        self.zone_radius = 35
-
-    # ---------------------------
-    def spawn_players(self):
-        colors = [(0,1,0),(1,0,0),(0,0.5,1),(1,1,0)]
-        names = ["VIPER","PHOENIX","FROST","REAPER"]
-        players = []
-
-        for i in range(4):
-            angle = i * (math.pi/2)
-            players.append(Player(
-                pos=np.array([math.cos(angle)*15,0.5,math.sin(angle)*15]),
-                vel=np.zeros(3),
-                color=colors[i],
-                name=names[i],
-                angle=angle+math.pi
-            ))
-        return players
+        # Live matches always get a seed so they can be recorded
+        self.replay = replay
+        self.record_path = record
+        self.recording = None
+        self.net = None
+        if connect:
+            # Remote match: the server simulates, we only send input and draw
+            self.net = NetClient()
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.connect(connect)
+            self.sock.setblocking(False)
+            self.send(self.net.join_packet())
+            self.world = ClientView(0)
+        elif replay:
+            self.world = replay.seek(0)
+        else:
+            seed = random.getrandbits(63) if seed is None else seed
+            self.world = World(seed=seed)
+            if record:
+                self.recording = Replay(seed, self.world.num_players)
+        self.speed = 1.0
+        self.paused = False
 
     # ---------------------------
-    def shoot(self, player, target):
-        if player.ammo <= 0: return
-        direction = target - player.pos
-        direction[1] = 0
-        direction /= np.linalg.norm(direction)
-        self.bullets.append(Bullet(
-            pos=player.pos + direction,
-            vel=direction * 0.9,
-            owner=player.name
-        ))
-        player.ammo -= 1
+    def update(self, inp):
+        """Run one fixed simulation tick with the local player's input"""
+        if self.net:
+            self.send(self.net.input_packet(inp))
+            return
+        if self.replay:
+            if self.world.tick >= self.replay.ticks:
+                return
+            inp = self.replay.input_at(self.world.tick)
+        elif self.recording:
+            inp = self.recording.record(self.world, inp)
+        self.world.step(inp)
 
-    # ---------------------------
-    def update(self, dt):
-        # AI
-        for ai in self.players[1:]:
-            if not ai.alive: continue
-            target = self.players[0]
-            if random.random() < 0.02:
-                self.shoot(ai, target.pos)
-            move = target.pos - ai.pos
-            move[1] = 0
-            ai.pos += (move/np.linalg.norm(move)) * dt * 0.08
+    def seek(self, seconds):
+        """Jump a replay by the given number of seconds (either direction)"""
+        self.world = self.replay.seek(self.world.tick + seconds * TICK_RATE)
 
-        # Bullets
-        for b in self.bullets[:]:
-            b.pos += b.vel
-            b.life -= dt
-            if b.life <= 0:
-                self.bullets.remove(b)
-                continue
+    def send(self, packet):
+        """Best effort, like UDP itself: a server that is down (ICMP refused) just loses the packet"""
+        try:
+            self.sock.send(packet)
+        except (BlockingIOError, ConnectionRefusedError):
+            pass
 
-            for p in self.players:
-                if p.alive and p.name != b.owner:
-                    if np.linalg.norm(p.pos - b.pos) < 0.8:
-                        p.health -= 15
-                        if p.health <= 0:
-                            p.alive = False
-                        self.bullets.remove(b)
-                        break
-
-        # Camera
-        alive = [p.pos for p in self.players if p.alive]
-        if alive:
-            self.camera.update(np.mean(alive, axis=0))
+    def poll_network(self):
+        while True:
+            try:
+                self.net.handle(self.sock.recv(65536))
+            except (BlockingIOError, ConnectionRefusedError):
+                break
+        if self.net.view is not None:
+            self.world = self.net.interpolate()
 
     # ---------------------------
     def draw(self):
@@ -154,72 +864,521 @@ class BattleRoyale3D:
         glLoadIdentity()
 
         gluLookAt(*self.camera.pos, *self.camera.target, 0,1,0)
-
-        # Ground
-        glColor3f(0.4,0.35,0.3)
-        glBegin(GL_QUADS)
-        glVertex3f(-50,0,-50)
-        glVertex3f(50,0,-50)
-        glVertex3f(50,0,50)
-        glVertex3f(-50,0,50)
-        glEnd()
-
-        # Zone
-        glColor3f(1,0,0)
-        glBegin(GL_LINE_LOOP)
-        for i in range(60):
-            a = i/60*2*math.pi
-            glVertex3f(math.cos(a)*self.zone_radius,0.1,math.sin(a)*self.zone_radius)
-        glEnd()
-
-        # Players
-        for p in self.players:
-            if not p.alive: continue
-            glPushMatrix()
-            glTranslatef(*p.pos)
-            glColor3fv(p.color)
-            quad = gluNewQuadric()
-            gluSphere(quad,0.6,16,16)
-            gluDeleteQuadric(quad)
-            glPopMatrix()
-
-        # Bullets
-        glPointSize(6)
-        glBegin(GL_POINTS)
-        glColor3f(1,1,0)
-        for b in self.bullets:
-            glVertex3fv(b.pos)
-        glEnd()
+        self.renderer.draw(self.world)
 
         pygame.display.flip()
 
     # ---------------------------
+    def handle_replay_key(self, key):
+        if key == K_RIGHT: self.seek(10)
+        elif key == K_LEFT: self.seek(-10)
+        elif key == K_UP: self.speed = min(self.speed * 2, 64)
+        elif key == K_DOWN: self.speed = max(self.speed / 2, 0.125)
+        elif key == K_SPACE: self.paused = not self.paused
+
     def run(self):
         running = True
+        lag = 0.0
+        inp = PlayerInput()
         while running:
-            dt = self.clock.tick(FPS) / 60
+            frame = self.clock.tick(FPS) / 1000
+            if not self.paused:
+                lag += frame * self.speed
 
             for e in pygame.event.get():
                 if e.type == QUIT or (e.type==KEYDOWN and e.key==K_ESCAPE):
                     running = False
-                if e.type == MOUSEBUTTONDOWN:
-                    self.shoot(self.players[0], self.players[0].pos + np.array([math.cos(self.players[0].angle)*10,0,math.sin(self.players[0].angle)*10]))
-                if e.type == MOUSEMOTION:
-                    self.players[0].angle -= e.rel[0] * 0.004
+                elif self.replay:
+                    if e.type == KEYDOWN:
+                        self.handle_replay_key(e.key)
+                elif e.type == MOUSEBUTTONDOWN:
+                    inp.fire = True
+                elif e.type == MOUSEMOTION:
+                    inp.turn -= e.rel[0] * 0.004
 
             keys = pygame.key.get_pressed()
-            p = self.players[0]
-            if p.alive:
-                if keys[K_w]:
-                    p.pos += np.array([math.cos(p.angle),0,math.sin(p.angle)]) * dt * 4
-                if keys[K_s]:
-                    p.pos -= np.array([math.cos(p.angle),0,math.sin(p.angle)]) * dt * 4
-
-            self.update(dt)
+            inp.forward = int(keys[K_w]) - int(keys[K_s])
+
+            # Fixed timestep: run as many ticks as real time has accumulated
+            ticks = 0
+            catchup = MAX_CATCHUP_TICKS * max(1, int(self.speed))
+            while lag >= TICK_DT and ticks < catchup:
+                self.update(inp)
+                inp = PlayerInput(forward=inp.forward)  # turn and fire apply once
+                lag -= TICK_DT
+                ticks += 1
+            if ticks == catchup:
+                lag %= TICK_DT
+            if self.net:
+                self.poll_network()
+
+            alive = self.world.p_pos[self.world.p_alive]
+            if len(alive):
+                self.camera.update(alive.mean(axis=0), self.world.tick * TICK_DT)
             self.draw()
 
         pygame.quit()
+        if self.net:
+            self.send(self.net.leave_packet())
+        if self.recording:
+            self.recording.save(self.record_path)
+            print(f"Replay saved: {self.record_path} ({self.recording.ticks} ticks)")
+
+
+# -------------------------------
+# HEADLESS SIMULATION
+# -------------------------------
+def simulate_match(seed, num_players=4, max_ticks=MAX_MATCH_TICKS, record=None):
+    """Play one all-bot match with no window or GL context, as fast as possible"""
+    world = World(num_players=num_players, seed=seed, human=False, effects=False)
+    replay = Replay(seed, num_players, human=False) if record else None
+    start = time.perf_counter()
+    while not world.finished and world.tick < max_ticks:
+        world.step(replay.record(world, PlayerInput()) if replay else None)
+    if replay:
+        replay.save(record)
+    return {
+        "seed": seed,
+        "ticks": world.tick,
+        "wall": time.perf_counter() - start,
+        "winner": world.winner,
+        "kills": world.p_kills.tolist(),
+        "timings": world.timings,
+    }
+
+
+def _simulate_seed(job):
+    return simulate_match(*job)
+
+
+def benchmark(matches, workers=None, num_players=4, max_ticks=MAX_MATCH_TICKS, seed=0):
+    """Simulate seeded matches across a process pool and print a summary"""
+    workers = workers or os.cpu_count()
+    jobs = [(seed + i, num_players, max_ticks) for i in range(matches)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_simulate_seed, jobs, chunksize=max(1, matches // 64)))
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(r["ticks"] for r in results)
+    sim_time = sum(r["wall"] for r in results)
+    phases = {k: sum(r["timings"][k] for r in results) for k in World.PHASES}
+    winners = Counter(r["winner"] for r in results)
+    lengths = np.array([r["ticks"] for r in results]) / TICK_RATE
+    kills = np.array([sum(r["kills"]) for r in results])
+
+    print(f"\n🎮 Headless benchmark: {matches} matches, {num_players} players, "
+          f"{workers} workers")
+    print("-" * 50)
+    print(f"Wall time       {elapsed:8.2f} s")
+    print(f"Ticks/s total   {ticks / elapsed:8.0f}")
+    print(f"Ticks/s/worker  {ticks / sim_time:8.0f}")
+    for name, t in phases.items():
+        print(f"  {name:<12}  {t / ticks * 1e6:8.1f} µs/tick  ({t / sim_time:5.1%})")
+    print(f"Match length    mean {lengths.mean():.1f}s  p50 {np.median(lengths):.1f}s  max {lengths.max():.1f}s")
+    print(f"Kills/match     mean {kills.mean():.2f}")
+    print(f"Timeouts        {winners.pop(None, 0)}")
+    for slot, wins in sorted(winners.items()):
+        print(f"  P{slot} wins     {wins:5d}  ({wins / matches:.1%})")
+    return results
+
+
+# -------------------------------
+# NETWORK
+# -------------------------------
+MSG_JOIN, MSG_WELCOME, MSG_INPUT, MSG_SNAPSHOT, MSG_LEAVE = range(1, 6)
+NO_BASELINE = 0xFFFFFFFF
+
+WELCOME = struct.Struct("<BHHH")          # type, slot, players, tick rate
+INPUT = struct.Struct("<BIIbf?")          # type, seq, acked snapshot, forward, turn, fire
+SNAPSHOT = struct.Struct("<BIIHHHhhh")    # type, tick, baseline, players, changed, bullets, zone x/z/r
+PLAYER_FIELDS = 5                         # x, z, angle, health, alive
+FIELD_BITS = 1 << np.arange(PLAYER_FIELDS, dtype=np.uint8)
+
+
+def quantize_players(world):
+    """Players as int16 rows (x, z, angle, health, alive), the unit of delta coding"""
+    q = np.empty((world.num_players, PLAYER_FIELDS), dtype=np.int16)
+    q[:, :2] = np.clip(np.round(world.p_pos[:, [0, 2]] * NET_QUANT), -32768, 32767)
+    angle = (world.p_angle + math.pi) % (2*math.pi) - math.pi
+    q[:, 2] = np.round(angle / math.pi * 32767)
+    q[:, 3] = np.clip(np.round(world.p_health), 0, 100)
+    q[:, 4] = world.p_alive
+    return q
+
+
+def encode_snapshot(tick, state, bullets, zone, base_tick=NO_BASELINE, base=None):
+    """Snapshot packet carrying only the fields that differ from `base`.
+
+    Layout after the header: changed row indices (u2), one field mask per
+    row (u1), the changed field values in row order (i2), then bullets.
+    With no baseline every field of every row is sent.
+    """
+    diff = np.ones(state.shape, dtype=bool) if base is None else state != base
+    changed = np.flatnonzero(diff.any(axis=1))
+    masks = (diff[changed] * FIELD_BITS).sum(axis=1, dtype=np.uint8)
+    header = SNAPSHOT.pack(MSG_SNAPSHOT, tick, base_tick if base is not None else NO_BASELINE,
+                           len(state), len(changed), len(bullets), *zone)
+    return b"".join([header, changed.astype("<u2").tobytes(), masks.tobytes(),
+                     state[changed][diff[changed]].astype("<i2").tobytes(), bullets.tobytes()])
+
+
+def decode_snapshot(data, state):
+    """Apply a snapshot's fields to `state` in place; returns the bullets"""
+    _, _, _, _, changed, num_bullets, *_ = SNAPSHOT.unpack_from(data)
+    offset = SNAPSHOT.size
+    rows = np.frombuffer(data, dtype="<u2", count=changed, offset=offset)
+    masks = np.frombuffer(data, dtype=np.uint8, count=changed, offset=offset + 2*changed)
+    fields = (masks[:, None] & FIELD_BITS) != 0
+    offset += 3 * changed
+    values = np.frombuffer(data, dtype="<i2", count=int(fields.sum()), offset=offset)
+    updated = state[rows]
+    updated[fields] = values
+    state[rows] = updated
+    return np.frombuffer(data, dtype="<i2", count=2 * num_bullets,
+                         offset=offset + values.nbytes).reshape(-1, 2)
+
+
+class RemoteClient:
+    def __init__(self, slot):
+        self.slot = slot
+        self.seq = 0
+        self.ack = NO_BASELINE
+        self.forward = 0
+        self.turn = 0.0
+        self.fire = False
+        self.last_seen = time.monotonic()
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+
+class GameServer(asyncio.DatagramProtocol):
+    """Authoritative LAN server: owns the World, applies client input each
+    tick and sends each client a snapshot delta-coded against the last one
+    it acknowledged. Slots nobody controls are played by bots.
+    """
+    def __init__(self, world):
+        self.world = world
+        self.clients = {}
+        self.history = {}
+        self.tick_times = []
+        self.bytes_full = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        client = self.clients.get(addr)
+        kind = data[0]
+        if kind == MSG_JOIN:
+            if client is None:
+                w = self.world
+                free = np.flatnonzero(~w.p_human & w.p_alive)
+                if not len(free):
+                    return  # full
+                client = self.clients[addr] = RemoteClient(int(free[0]))
+                w.p_human[client.slot] = True
+            self.transport.sendto(WELCOME.pack(MSG_WELCOME, client.slot, self.world.num_players,
+                                               TICK_RATE), addr)
+        elif client is None:
+            return
+        elif kind == MSG_INPUT:
+            _, seq, ack, forward, turn, fire = INPUT.unpack_from(data)
+            client.bytes_up += len(data)
+            client.last_seen = time.monotonic()
+            if ack != NO_BASELINE and (client.ack == NO_BASELINE or ack > client.ack):
+                client.ack = ack
+            if seq > client.seq:
+                # Turns and shots accumulate until the next tick; held keys just update
+                client.seq = seq
+                client.forward = forward
+                client.turn += turn
+                client.fire |= fire
+        elif kind == MSG_LEAVE:
+            self.drop(addr)
+
+    def drop(self, addr):
+        client = self.clients.pop(addr)
+        self.world.p_human[client.slot] = False
+
+    def tick(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        for addr, c in list(self.clients.items()):
+            if now - c.last_seen > NET_TIMEOUT:
+                self.drop(addr)
+                continue
+            self.world.apply_input(c.slot, PlayerInput(c.forward, c.turn, c.fire))
+            c.turn, c.fire = 0.0, False
+        self.world.step()
+        if self.world.tick % NET_SNAPSHOT_TICKS == 0:
+            self.broadcast()
+        self.tick_times.append(time.perf_counter() - start)
+
+    def broadcast(self):
+        w = self.world
+        tick = w.tick
+        state = quantize_players(w)
+        self.history[tick] = state
+        self.history.pop(tick - NET_HISTORY * NET_SNAPSHOT_TICKS, None)
+
+        bullets = np.round(w.bullets.pos[w.bullets.live()][:, [0, 2]] * NET_QUANT).astype("<i2")
+        zone = np.round(np.array([*w.zone_center, w.zone_radius]) * NET_QUANT).astype(int)
+        full = None
+        for addr, c in self.clients.items():
+            base = self.history.get(c.ack)
+            packet = encode_snapshot(tick, state, bullets, zone, c.ack, base)
+            if base is not None and full is None:
+                full = len(encode_snapshot(tick, state, bullets, zone))
+            self.bytes_full += full or len(packet)
+            c.bytes_down += len(packet)
+            self.transport.sendto(packet, addr)
+
+    async def serve(self, duration=None):
+        """Tick at TICK_RATE against the event loop clock"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        end = None if duration is None else next_tick + duration
+        while end is None or next_tick < end:
+            self.tick()
+            next_tick += TICK_DT
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+class ClientView:
+    """What a client knows about the match, shaped like World for the Renderer"""
+    def __init__(self, num_players):
+        self.num_players = num_players
+        self.p_pos = np.zeros((num_players, 3))
+        self.p_pos[:, 1] = 0.5
+        self.p_alive = np.zeros(num_players, dtype=bool)
+        self.p_health = np.zeros(num_players)
+        self.p_color = np.array([PLAYER_COLORS[i % len(PLAYER_COLORS)] for i in range(num_players)],
+                                dtype=np.float32)
+        self.bullets = Pool(BULLET_CAPACITY, pos=((3,), np.float32))
+        self.particles = Pool(1, pos=((3,), np.float32))
+        self.zone_center = np.zeros(2)
+        self.zone_radius = ZONE_START_RADIUS
+        self.tick = 0
+
+
+class NetClient:
+    """Client side of the protocol, independent of how packets are moved.
+
+    Decodes delta snapshots against its own copy of each baseline and
+    interpolates between the two snapshots around (server time - 100 ms).
+    """
+    def __init__(self):
+        self.slot = None
+        self.view = None
+        self.seq = 0
+        self.latest = None
+        self.history = {}
+        self.frames = []  # (tick, arrival time, state, bullets, zone), oldest first
+        self.bytes_up = 0
+        self.bytes_down = 0
+
+    def join_packet(self):
+        return bytes([MSG_JOIN])
+
+    def leave_packet(self):
+        return bytes([MSG_LEAVE])
+
+    def input_packet(self, inp):
+        self.seq += 1
+        ack = NO_BASELINE if self.latest is None else self.latest
+        packet = INPUT.pack(MSG_INPUT, self.seq, ack, inp.forward, inp.turn, inp.fire)
+        self.bytes_up += len(packet)
+        return packet
+
+    def handle(self, data, now=None):
+        self.bytes_down += len(data)
+        kind = data[0]
+        if kind == MSG_WELCOME:
+            _, self.slot, num_players, _ = WELCOME.unpack_from(data)
+            if self.view is None:
+                self.view = ClientView(num_players)
+        elif kind == MSG_SNAPSHOT:
+            self._handle_snapshot(data, time.monotonic() if now is None else now)
+
+    def _handle_snapshot(self, data, now):
+        _, tick, base, players, _, _, *zone = SNAPSHOT.unpack_from(data)
+        if self.latest is not None and tick <= self.latest:
+            return  # late or duplicate
+        if base == NO_BASELINE:
+            state = np.zeros((players, PLAYER_FIELDS), dtype=np.int16)
+        elif base in self.history:
+            state = self.history[base].copy()
+        else:
+            return  # baseline already dropped; the server will fall back to a full snapshot
+        bullets = decode_snapshot(data, state)
+
+        self.latest = tick
+        self.history[tick] = state
+        self.history.pop(tick - NET_HISTORY * NET_SNAPSHOT_TICKS, None)
+        self.frames.append((tick, now, state, bullets, np.array(zone, dtype=float) / NET_QUANT))
+        del self.frames[:-8]
+        if self.view is None:
+            self.view = ClientView(players)
+
+    def interpolate(self, now=None):
+        """Update and return the view for rendering at `now`"""
+        view = self.view
+        if not self.frames:
+            return view
+        now = time.monotonic() if now is None else now
+        tick, arrived = self.frames[-1][:2]
+        render_tick = tick + (now - arrived) * TICK_RATE - NET_INTERP_TICKS
+
+        a = b = self.frames[-1]
+        for older, newer in zip(self.frames, self.frames[1:]):
+            if older[0] <= render_tick <= newer[0]:
+                a, b = older, newer
+                break
+        else:
+            if render_tick < self.frames[0][0]:
+                a = b = self.frames[0]
+        f = 0.0 if b[0] == a[0] else (render_tick - a[0]) / (b[0] - a[0])
+
+        xz = (a[2][:, :2] + (b[2][:, :2].astype(float) - a[2][:, :2]) * f) / NET_QUANT
+        view.p_pos[:, 0], view.p_pos[:, 2] = xz[:, 0], xz[:, 1]
+        view.p_health[:] = b[2][:, 3]
+        view.p_alive[:] = b[2][:, 4] > 0
+        zone = a[4] + (b[4] - a[4]) * f
+        view.zone_center, view.zone_radius = zone[:2], float(zone[2])
+        view.tick = int(render_tick)
+
+        pool = view.bullets
+        pool.release(pool.live())
+        slots = pool.alloc(len(b[3]))
+        pool.pos[slots, 0] = b[3][:len(slots), 0] / NET_QUANT
+        pool.pos[slots, 1] = 0.5
+        pool.pos[slots, 2] = b[3][:len(slots), 1] / NET_QUANT
+        return view
+
+
+class ScriptedClient(asyncio.DatagramProtocol):
+    """Headless LAN client that wanders and fires at random, for tests and benchmarks"""
+    def __init__(self, seed):
+        self.net = NetClient()
+        self.rng = random.Random(seed)
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.sendto(self.net.join_packet())
+
+    def datagram_received(self, data, addr):
+        self.net.handle(data)
+
+    async def play(self):
+        forward = 1
+        while True:
+            if self.rng.random() < 0.02:
+                forward = self.rng.choice([-1, 0, 1])
+            inp = PlayerInput(forward, self.rng.uniform(-0.02, 0.02), self.rng.random() < 0.05)
+            self.transport.sendto(self.net.input_packet(inp))
+            self.net.interpolate()
+            await asyncio.sleep(TICK_DT)
+
+
+async def run_server(port, num_players, seed=None):
+    world = World(num_players=num_players, seed=seed, human=False)
+    server = GameServer(world)
+    loop = asyncio.get_running_loop()
+    await loop.create_datagram_endpoint(lambda: server, local_addr=("0.0.0.0", port))
+    print(f"🛰  Serving {num_players}-player match on UDP :{port}")
+    await server.serve()
+
+
+async def net_benchmark(counts, seconds=3.0):
+    """Server tick cost and per-client bandwidth on localhost as lobbies grow"""
+    loop = asyncio.get_running_loop()
+    print("\n🛰  LAN benchmark (server and scripted clients share this process)")
+    print("-" * 78)
+    print(f"{'clients':>7} {'tick ms':>8} {'p99 ms':>7} {'down B/s':>9} {'up B/s':>7} "
+          f"{'vs full':>8} {'desync':>6}")
+    for n in counts:
+        server = GameServer(World(num_players=n, seed=0, human=False, effects=False))
+        transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=("127.0.0.1", 0))
+        port = transport.get_extra_info("sockname")[1]
+
+        clients, endpoints = [], []
+        for i in range(n):
+            client = ScriptedClient(i)
+            t, _ = await loop.create_datagram_endpoint(lambda c=client: c, remote_addr=("127.0.0.1", port))
+            clients.append(client)
+            endpoints.append(t)
+        tasks = [asyncio.create_task(c.play()) for c in clients]
+        await server.serve(seconds)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Every decoded client state must match what the server sent
+        desync = sum(not np.array_equal(state, server.history[tick])
+                     for c in clients for tick, state in c.net.history.items()
+                     if tick in server.history)
+        ticks = np.array(server.tick_times) * 1000
+        down = sum(c.bytes_down for c in server.clients.values()) / n / seconds
+        up = sum(c.bytes_up for c in server.clients.values()) / n / seconds
+        sent = sum(c.bytes_down for c in server.clients.values())
+        print(f"{n:>7} {ticks.mean():8.3f} {np.percentile(ticks, 99):7.3f} {down:9.0f} {up:7.0f} "
+              f"{sent / max(server.bytes_full, 1):8.1%} {desync:6d}")
+        for t in endpoints + [transport]:
+            t.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Battle Royale 3D")
+    parser.add_argument("--seed", type=int, help="seed for the match RNG")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate one all-bot match without a window and print the result")
+    parser.add_argument("--benchmark", type=int, metavar="MATCHES",
+                        help="simulate this many seeded matches headless and report stats")
+    parser.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--max-ticks", type=int, default=MAX_MATCH_TICKS)
+    parser.add_argument("--record", metavar="PATH", help="write a replay of this match")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play back a replay (arrows seek/speed, space pauses); "
+                             "with --headless, re-simulate it and report")
+    parser.add_argument("--seek", type=float, default=0, metavar="SECONDS",
+                        help="start replay playback at this match time")
+    parser.add_argument("--server", action="store_true",
+                        help="host an authoritative LAN match (bots fill empty slots)")
+    parser.add_argument("--port", type=int, default=NET_PORT)
+    parser.add_argument("--connect", metavar="HOST", help="join a LAN match")
+    parser.add_argument("--net-bench", type=int, nargs="*", metavar="CLIENTS",
+                        help="measure server tick cost and bandwidth with scripted "
+                             "clients on localhost (default: 4 16 32 64)")
+    parser.add_argument("--seconds", type=float, default=3.0,
+                        help="duration of each --net-bench run")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    BattleRoyale3D().run()
+    args = parse_args()
+    replay = Replay.load(args.replay) if args.replay else None
+    if args.net_bench is not None:
+        asyncio.run(net_benchmark(args.net_bench or [4, 16, 32, 64], args.seconds))
+    elif args.server:
+        asyncio.run(run_server(args.port, args.players, args.seed))
+    elif args.benchmark:
+        benchmark(args.benchmark, args.workers, args.players, args.max_ticks, args.seed or 0)
+    elif args.headless and replay:
+        start = time.perf_counter()
+        world = replay.seek(args.seek * TICK_RATE or replay.ticks)
+        print(f"Tick {world.tick}/{replay.ticks} reached in {time.perf_counter() - start:.3f}s  "
+              f"alive: {np.flatnonzero(world.p_alive).tolist()}  kills: {world.p_kills.tolist()}")
+    elif args.headless:
+        result = simulate_match(args.seed or 0, args.players, args.max_ticks, args.record)
+        print(f"Winner: {result['winner']}  ticks: {result['ticks']}  "
+              f"({result['ticks'] / result['wall']:.0f} ticks/s)  kills: {result['kills']}")
+    else:
+        game = BattleRoyale3D(seed=args.seed, record=args.record, replay=replay,
+                              connect=(args.connect, args.port) if args.connect else None)
+        if replay and args.seek:
+            game.seek(args.seek)
+        game.run()
@@ -1,87 +1,203 @@
-import cv2
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
+import numpy as np
 import math
-import random
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+import time
+import ctypes
+import argparse
+import threading
+import struct
+import zlib
+from collections import namedtuple, Counter
+from dataclasses import dataclass
+
+try:
+    import pygame
+    from pygame.locals import *
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+except ImportError:  # the swarm benchmark needs neither a window nor GL
+    pygame = None
+
+try:
+    import cv2
+    import mediapipe as mp
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+except ImportError:  # ...nor a camera and hand tracker
+    cv2 = mp = None
 
 # ======================
 # CONFIGURATION
 # ======================
 WIDTH, HEIGHT = 1280, 800
 MAX_SWORDS = 1000
+GESTURES = ("SQUARE", "HEART", "MAGIC", "WALL", "VORTEX")
 
-class Sword:
-    def __init__(self):
-        self.pos = [random.uniform(-30, 30), random.uniform(-20, 20), random.uniform(-20, 20)]
-        self.vel = [0, 0, 0]
-        self.color = [1, 1, 1]
-        self.offset = random.random() * 2 * math.pi 
+# ======================
+# SWARM ENGINE
+# ======================
+class Swarm:
+    """Every sword at once: positions, velocities, phase offsets and colors
+    live in NumPy arrays and each frame is a handful of whole-array ops.
+
+    A gesture's formation fills `target` for all swords in one go, then a
+    single in-place steering/friction step moves the swarm toward it.
+    """
+    STEER = 0.25
+    FRICTION = 0.82  # High friction for crisp shapes
+
+    COLORS = {
+        "SQUARE": (1.0, 0.1, 0.1),   # Red
+        "HEART":  (1.0, 0.3, 0.6),   # Pink
+        "MAGIC":  (0.0, 0.8, 1.0),   # Electric Blue
+        "WALL":   (0.9, 0.9, 1.0),   # White/Silver
+        "VORTEX": (0.3, 1.0, 0.4),   # Emerald Green
+    }
+
+    def __init__(self, count=MAX_SWORDS, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.empty((count, 3), dtype=np.float32)
+        self.pos[:, 0] = self.rng.uniform(-30, 30, count)
+        self.pos[:, 1:] = self.rng.uniform(-20, 20, (count, 2))
+        self.vel = np.zeros((count, 3), dtype=np.float32)
+        self.color = np.ones((count, 3), dtype=np.float32)
+        self.color_version = 0  # bumped whenever `color` changes
+        self.gesture = None
+        self.offset = self.rng.uniform(0, 2*math.pi, count).astype(np.float32)
+
+        # Scratch buffers reused every frame
+        self.target = np.empty((count, 3), dtype=np.float32)
+        self.phase = np.empty(count, dtype=np.float32)
+        self.dist = np.empty(count, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.pos)
+
+    # --- SHAPE COMMANDS ---
+    def _phase(self, t_ms, speed):
+        # Wrap the clock first so float32 phases stay precise in long sessions
+        return np.add(self.offset, (t_ms * speed) % (4*math.pi), out=self.phase)
+
+    def square(self, tx, ty, tz, t_ms):  # 1: Fist
+        side = 7.0
+        # One uniform in [0, 4): integer part picks the edge, fraction the spot on it
+        u = self.rng.random(len(self), dtype=np.float32, out=self.phase)
+        u *= 4
+        edge = u.astype(np.int8)
+        along = (u - edge) * (2*side) - side
+        rim = np.where(edge % 2 == 0, np.float32(side), np.float32(-side))
+        top_or_bottom = edge < 2
+        self.target[:, 0] = tx + np.where(top_or_bottom, along, rim)
+        self.target[:, 1] = ty + np.where(top_or_bottom, rim, along)
+        self.target[:, 2] = tz
+
+    def heart(self, tx, ty, tz, t_ms):  # 2: Thumb
+        t = self._phase(t_ms, 0.002)
+        s, c = np.sin(t), np.cos(t)
+        # Parametric Heart Formula: 16 sin³t, 13cos t - 5cos 2t - 2cos 3t - cos 4t,
+        # the latter expanded into a polynomial in cos t to skip three cosines
+        hy = c * 8 + 8
+        hy *= c; hy += 2
+        hy *= c; np.subtract(19, hy, out=hy)
+        hy *= c; hy += 4
+        s *= s * s
+        self.target[:, 0] = tx + s * 8
+        self.target[:, 1] = ty + hy * 0.5
+        self.target[:, 2] = tz
+
+    def magic(self, tx, ty, tz, t_ms):  # 3: Two Fingers (Double Helix)
+        t = self._phase(t_ms, 0.004)
+        self.target[:, 0] = tx + np.cos(t) * 6
+        self.target[:, 1] = ty + np.sin(t) * 6
+        self.target[:, 2] = tz + np.sin(t * 0.5) * 12
+
+    def wall(self, tx, ty, tz, t_ms):  # 4: Four Fingers
+        n = len(self)
+        self.target[:, 0] = tx + self.rng.uniform(-12, 12, n)
+        self.target[:, 1] = ty + self.rng.uniform(-10, 10, n)
+        self.target[:, 2] = -8
 
-    def update(self, target, gesture, active):
+    def vortex(self, tx, ty, tz, t_ms):  # 5: Five Fingers
+        r = 10.0
+        t = self._phase(t_ms, 0.002)
+        self.target[:, 0] = tx + np.cos(t) * r
+        self.target[:, 1] = ty + np.sin(t) * r
+        self.target[:, 2] = tz
+
+    FORMATIONS = {"SQUARE": square, "HEART": heart, "MAGIC": magic, "WALL": wall, "VORTEX": vortex}
+
+    # --- PHYSICS ---
+    def update(self, target, gesture, active, t_ms):
+        """Advance one frame toward `gesture`'s formation around `target`"""
         if active:
-            tx, ty, tz = target
-            
-            # --- SHAPE COMMANDS ---
-            if gesture == "SQUARE": # 1: Fist
-                side = 7.0
-                edge = random.randint(0, 3)
-                if edge == 0: tx += random.uniform(-side, side); ty += side
-                elif edge == 1: tx += random.uniform(-side, side); ty -= side
-                elif edge == 2: tx += side; ty += random.uniform(-side, side)
-                else: tx -= side; ty += random.uniform(-side, side)
-                self.color = [1.0, 0.1, 0.1] # Red
-
-            elif gesture == "HEART": # 2: Thumb
-                t = self.offset + pygame.time.get_ticks() * 0.002
-                # Parametric Heart Formula
-                hx = 16 * math.sin(t)**3
-                hy = 13 * math.cos(t) - 5 * math.cos(2*t) - 2 * math.cos(3*t) - math.cos(4*t)
-                tx += hx * 0.5
-                ty += hy * 0.5
-                self.color = [1.0, 0.3, 0.6] # Pink
-
-            elif gesture == "MAGIC": # 3: Two Fingers (Double Helix)
-                t = self.offset + pygame.time.get_ticks() * 0.004
-                tx += math.cos(t) * 6
-                ty += math.sin(t) * 6
-                tz += math.sin(t * 0.5) * 12
-                self.color = [0.0, 0.8, 1.0] # Electric Blue
-
-            elif gesture == "WALL": # 4: Four Fingers
-                tx += random.uniform(-12, 12)
-                ty += random.uniform(-10, 10)
-                tz = -8
-                self.color = [0.9, 0.9, 1.0] # White/Silver
-
-            else: # 5: Five Fingers (Vortex)
-                r = 10.0
-                tx += math.cos(self.offset + pygame.time.get_ticks() * 0.002) * r
-                ty += math.sin(self.offset + pygame.time.get_ticks() * 0.002) * r
-                self.color = [0.3, 1.0, 0.4] # Emerald Green
-
-            # --- PHYSICS ---
-            dx, dy, dz = tx - self.pos[0], ty - self.pos[1], tz - self.pos[2]
-            dist = math.sqrt(dx**2 + dy**2 + dz**2) + 0.1
-            self.vel[0] += (dx / dist) * 0.25
-            self.vel[1] += (dy / dist) * 0.25
-            self.vel[2] += (dz / dist) * 0.25
-        
-        for i in range(3):
-            self.pos[i] += self.vel[i]
-            self.vel[i] *= 0.82 # High friction for crisp shapes
-
-    def draw(self):
-        glBegin(GL_LINES)
-        glColor3f(*self.color)
-        glVertex3f(self.pos[0], self.pos[1], self.pos[2])
-        glColor3f(0, 0, 0)
-        glVertex3f(self.pos[0]-self.vel[0]*4, self.pos[1]-self.vel[1]*4, self.pos[2]-self.vel[2]*4)
-        glEnd()
+            self.FORMATIONS.get(gesture, Swarm.vortex)(self, *target, t_ms)
+            if gesture != self.gesture:
+                self.gesture = gesture
+                self.color[:] = self.COLORS.get(gesture, self.COLORS["VORTEX"])
+                self.color_version += 1
+
+            d = np.subtract(self.target, self.pos, out=self.target)
+            np.einsum("ij,ij->i", d, d, out=self.dist)
+            np.sqrt(self.dist, out=self.dist)
+            self.dist += 0.1
+            np.divide(self.STEER, self.dist, out=self.dist)
+            d *= self.dist[:, None]
+            self.vel += d
+
+        self.pos += self.vel
+        self.vel *= self.FRICTION
+
+
+class SwarmRenderer:
+    """Draws every sword trail with one glDrawArrays call.
+
+    Each sword is a line from its colored head to a black tail trailing
+    along its velocity. Both ends go into one interleaved xyzrgb array
+    that is refilled in place and streamed through a single VBO each
+    frame. Only needs GL 1.5, so software GL keeps up too.
+    """
+    TRAIL = 4
+
+    def __init__(self):
+        self.vertices = np.zeros((0, 2, 6), dtype=np.float32)
+        self.vbo = None
+
+    def _resize(self, count):
+        self.vertices = np.zeros((count, 2, 6), dtype=np.float32)  # tails stay black
+        self.tail_scratch = np.empty((count, 3), dtype=np.float32)
+        # 12-byte void views copy whole xyz/rgb triples at once, several
+        # times faster than strided float copies
+        self.head_xyz = self.vertices[:, 0, :3].view("V12")
+        self.head_rgb = self.vertices[:, 0, 3:].view("V12")
+        self.tail_xyz = self.vertices[:, 1, :3].view("V12")
+        self.color_version = None
+
+    def fill(self, swarm):
+        """Write the swarm's line vertices into the shared array (no GL needed)"""
+        if len(self.vertices) != len(swarm):
+            self._resize(len(swarm))
+        self.head_xyz[...] = swarm.pos.view("V12")
+        if self.color_version != swarm.color_version:
+            self.head_rgb[...] = swarm.color.view("V12")
+            self.color_version = swarm.color_version
+        tail = np.multiply(swarm.vel, -self.TRAIL, out=self.tail_scratch)
+        tail += swarm.pos
+        self.tail_xyz[...] = tail.view("V12")
+        return self.vertices
+
+    def draw(self, swarm):
+        data = self.fill(swarm)
+        if self.vbo is None:
+            self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 24, ctypes.c_void_p(0))
+        glColorPointer(3, GL_FLOAT, 24, ctypes.c_void_p(12))
+        glDrawArrays(GL_LINES, 0, 2 * len(data))
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
 # ======================
 # GESTURE CLASSIFIER
@@ -94,7 +210,7 @@ def get_gesture(landmarks):
     for tip, pip in [(8,6), (12,10), (16,14), (20,18)]:
         if landmarks[tip].y < landmarks[pip].y:
             fingers.append("FINGER")
-    
+
     count = len(fingers)
     if count == 0: return "SQUARE"
     if count == 1 and "THUMB" in fingers: return "HEART"
@@ -102,50 +218,588 @@ def get_gesture(landmarks):
     if count == 4: return "WALL"
     return "VORTEX"
 
+# ======================
+# INPUT PIPELINE
+# ======================
+Landmark = namedtuple("Landmark", "x y z")
+
+
+@dataclass(frozen=True)
+class HandState:
+    active: bool = False
+    gesture: str = "VORTEX"
+    target: tuple = (0, 0, 0)
+    stamp: float = 0.0  # perf_counter() when the source frame was captured
+
+
+def hand_state(landmarks, stamp):
+    if landmarks is None:
+        return HandState(stamp=stamp)
+    return HandState(True, get_gesture(landmarks),
+                     ((landmarks[9].x - 0.5) * 55, (0.5 - landmarks[9].y) * 45, 0), stamp)
+
+
+class LatestSlot:
+    """Single-writer mailbox that only keeps the newest item.
+
+    Publishing rebinds one tuple, which is atomic under the GIL, so readers
+    never block or see a half-written value, and a slow reader skips stale
+    items instead of letting them queue up as latency.
+    """
+    def __init__(self, value=None):
+        self._item = (0, value)
+
+    def put(self, value):
+        self._item = (self._item[0] + 1, value)
+
+    def get(self):
+        """(sequence number, value); the number changes with every put"""
+        return self._item
+
+
+class VideoSource:
+    """Webcam index or recorded video file; files are paced at their own FPS"""
+    def __init__(self, device=0):
+        self.cap = cv2.VideoCapture(device)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if isinstance(device, str) else 0
+        self.interval = 1 / fps if fps > 0 else 0  # cameras pace themselves
+
+    def read(self):
+        ok, frame = self.cap.read()
+        return frame if ok else None
+
+    def close(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    """Generated BGR frames (a drifting bright blob) for running without a camera"""
+    def __init__(self, width=640, height=480, fps=30, frames=None):
+        self.width, self.height = width, height
+        self.interval = 1 / fps
+        self.frames = frames
+        self.count = 0
+        self.yy, self.xx = np.mgrid[0:height, 0:width].astype(np.float32)
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return None
+        t = self.count * self.interval
+        self.count += 1
+        cx = self.width * (0.5 + 0.3 * math.sin(t))
+        cy = self.height * (0.5 + 0.3 * math.cos(t * 0.7))
+        blob = np.exp(-((self.xx - cx)**2 + (self.yy - cy)**2) / (2 * 40.0**2))
+        return np.repeat((blob * 255).astype(np.uint8)[:, :, None], 3, axis=2)
+
+    def close(self):
+        pass
+
+
+def downscale(img, size):
+    """Shrink so the longer side is at most `size` px"""
+    h, w = img.shape[:2]
+    scale = size / max(h, w)
+    if scale >= 1:
+        return img
+    out_w, out_h = max(1, round(w * scale)), max(1, round(h * scale))
+    if cv2 is not None:
+        return cv2.resize(img, (out_w, out_h), interpolation=cv2.INTER_AREA)
+    rows = (np.arange(out_h) / scale).astype(int)
+    cols = (np.arange(out_w) / scale).astype(int)
+    return img[rows[:, None], cols]
+
+
+class RoiTracker:
+    """Wraps a detect(rgb) callable to search only around the last known hand.
+
+    The previous landmarks give a square box, enlarged so the hand can move
+    between frames; that crop is downscaled to at most INPUT_SIZE px and
+    the landmarks are mapped back to full-frame coordinates. Only when the
+    hand is lost in the crop does it fall back to the whole frame.
+    """
+    MARGIN = 1.8      # box side relative to the hand's extent
+    MIN_SIDE = 96     # px, so a distant hand still gets some context
+    INPUT_SIZE = 256
+
+    def __init__(self, detect):
+        self.detect = detect
+        self.box = None
+        self.tracked = 0
+        self.searched = 0
+        self.pixels = 0
+
+    def __call__(self, rgb):
+        h, w = rgb.shape[:2]
+        landmarks = None
+        if self.box is not None:
+            x0, y0, side = self.box
+            crop = np.ascontiguousarray(downscale(rgb[y0:y0 + side, x0:x0 + side], self.INPUT_SIZE))
+            self.tracked += 1
+            self.pixels += crop.shape[0] * crop.shape[1]
+            found = self.detect(crop)
+            if found is not None:
+                sx, sy = side / w, side / h
+                landmarks = [Landmark(x0 / w + lm.x * sx, y0 / h + lm.y * sy, lm.z * sx)
+                             for lm in found]
+        if landmarks is None:
+            self.searched += 1
+            self.pixels += h * w
+            landmarks = self.detect(rgb)
+        self.box = None if landmarks is None else self._box(landmarks, w, h)
+        return landmarks
+
+    def _box(self, landmarks, w, h):
+        xs = np.array([lm.x for lm in landmarks]) * w
+        ys = np.array([lm.y for lm in landmarks]) * h
+        side = max(np.ptp(xs), np.ptp(ys)) * self.MARGIN
+        side = int(min(max(side, self.MIN_SIDE), w, h))
+        x0 = int(np.clip((xs.min() + xs.max() - side) / 2, 0, w - side))
+        y0 = int(np.clip((ys.min() + ys.max() - side) / 2, 0, h - side))
+        return x0, y0, side
+
+    def stats(self):
+        total = max(self.tracked + self.searched, 1)
+        return f"tracked {self.tracked / total:.0%} | {self.pixels / total / 1000:.0f} kpx/frame"
+
+
+class HandFilter:
+    """Steadies what the swarm follows between (and across) inference results.
+
+    The target is low-pass filtered with a time constant of SMOOTHING
+    seconds, so it glides at render rate instead of jumping at camera rate.
+    A new gesture must be reported CONFIRM results in a row before the
+    swarm switches, and a hand missing for less than GRACE seconds is held.
+    The grace period starts at the first result without a hand, so slow
+    inference alone never drops a hand that is still in view.
+    """
+    SMOOTHING = 0.08
+    CONFIRM = 3
+    GRACE = 0.2
+
+    def __init__(self):
+        self.target = None
+        self.gesture = "VORTEX"
+        self.candidate = None
+        self.votes = 0
+        self.stamp = None
+        self.missing_since = -math.inf
+        self.time = None
+
+    def update(self, hand, now):
+        """Filtered HandState for render time `now` (seconds)"""
+        dt = 0.0 if self.time is None else now - self.time
+        self.time = now
+        if hand.stamp != self.stamp:  # a fresh result
+            self.stamp = hand.stamp
+            if hand.active:
+                if self.target is None:
+                    self.gesture, self.votes = hand.gesture, 0  # new hand: no debounce
+                elif hand.gesture == self.gesture:
+                    self.votes = 0
+                else:
+                    self.votes = self.votes + 1 if hand.gesture == self.candidate else 1
+                    self.candidate = hand.gesture
+                    if self.votes >= self.CONFIRM:
+                        self.gesture, self.votes = hand.gesture, 0
+                self.missing_since = None
+            elif self.missing_since is None:
+                self.missing_since = now
+
+        if self.missing_since is not None and now - self.missing_since > self.GRACE:
+            self.target = None
+            return HandState(False, self.gesture, (0, 0, 0), hand.stamp)
+        if hand.active:
+            goal = np.asarray(hand.target, dtype=float)
+            if self.target is None:
+                self.target = goal
+            else:
+                self.target += (goal - self.target) * (1 - math.exp(-dt / self.SMOOTHING))
+        return HandState(True, self.gesture, tuple(self.target), hand.stamp)
+
+
+def mediapipe_detector(model_path='hand_landmarker.task'):
+    """detect(rgb) -> landmarks of the first hand, or None"""
+    base_options = python.BaseOptions(model_asset_path=model_path)
+    options = vision.HandLandmarkerOptions(base_options=base_options, num_hands=1)
+    detector = vision.HandLandmarker.create_from_options(options)
+
+    def detect(rgb):
+        result = detector.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb))
+        return result.hand_landmarks[0] if result.hand_landmarks else None
+    return detect
+
+
+class InputPipeline:
+    """Camera capture and hand inference on their own threads.
+
+    The capture thread publishes raw frames; the inference thread always
+    takes the newest one, so a slow model drops frames rather than falling
+    behind. The render loop reads `hand` and never waits on either. OpenCV
+    and MediaPipe release the GIL while they work, so the stages overlap.
+    """
+    def __init__(self, source, detect, mirror=True, recording=None):
+        self.source = source
+        self.detect = detect
+        self.mirror = mirror
+        self.recording = recording
+        self.frames = LatestSlot()
+        self.hand = LatestSlot(HandState())
+        self.new_frame = threading.Event()
+        self.running = False
+        self.captured = 0
+        self.inferred = 0
+        self.latency = 0.0  # capture -> result, smoothed
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        self.threads = [threading.Thread(target=self._capture, daemon=True),
+                        threading.Thread(target=self._infer, daemon=True)]
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.new_frame.set()
+        for t in self.threads:
+            t.join()
+        self.source.close()
+
+    def latest(self):
+        return self.hand.get()[1]
+
+    def stats(self):
+        text = (f"camera {self.captured} inferred {self.inferred} | "
+                f"latency {self.latency * 1000:.0f} ms")
+        if hasattr(self.detect, "stats"):
+            text += f" | {self.detect.stats()}"
+        return text
+
+    def _capture(self):
+        next_frame = time.perf_counter()
+        while self.running:
+            frame = self.source.read()
+            if frame is None:
+                break  # end of a recording
+            self.frames.put((time.perf_counter(), frame))
+            self.captured += 1
+            self.new_frame.set()
+            if self.source.interval:
+                next_frame += self.source.interval
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
+        self.running = False
+        self.new_frame.set()
+
+    def _infer(self):
+        done = 0
+        while self.running:
+            self.new_frame.wait(0.1)
+            self.new_frame.clear()
+            seq, item = self.frames.get()
+            if seq == done:
+                continue
+            done = seq
+            stamp, frame = item
+            # Mirror and BGR -> RGB in a single contiguous copy
+            rgb = np.ascontiguousarray(frame[:, ::-1, ::-1] if self.mirror else frame[:, :, ::-1])
+            landmarks = self.detect(rgb)
+            self.hand.put(hand_state(landmarks, stamp))
+            if self.recording is not None:
+                self.recording.append(stamp, landmarks)
+            self.inferred += 1
+            self.latency += 0.1 * (time.perf_counter() - stamp - self.latency)
+
+# ======================
+# LANDMARK RECORDINGS
+# ======================
+class LandmarkRecording:
+    """Timestamped hand landmarks, so gestures can be replayed without a
+    camera, model or display.
+
+    File layout: header, then one zlib stream holding the frame times
+    (float32 ms), a presence byte per frame and float16 x/y/z for all 21
+    landmarks (zeros where no hand was seen) - about 130 bytes per frame
+    before compression.
+    """
+    MAGIC = b"SWLM"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHI")  # magic, version, landmarks per hand, frames
+    POINTS = 21
+
+    def __init__(self, stamps=(), present=(), points=()):
+        self.stamps = list(stamps)
+        self.present = list(present)
+        self.points = list(points)
+        self.origin = None
+
+    def __len__(self):
+        return len(self.stamps)
+
+    @property
+    def duration(self):
+        """Milliseconds from the first frame to the last"""
+        return self.stamps[-1] - self.stamps[0] if self.stamps else 0.0
+
+    def append(self, stamp, landmarks):
+        """Add a frame captured at perf_counter() time `stamp`"""
+        if self.origin is None:
+            self.origin = stamp
+        self.stamps.append((stamp - self.origin) * 1000)
+        self.present.append(landmarks is not None)
+        self.points.append(np.zeros((self.POINTS, 3)) if landmarks is None else
+                           np.array([(lm.x, lm.y, lm.z) for lm in landmarks]))
+
+    def landmarks(self, i):
+        """Frame i as Landmark tuples, or None when no hand was seen"""
+        if not self.present[i]:
+            return None
+        return [Landmark(*p) for p in self.points[i].tolist()]
+
+    def save(self, path):
+        payload = b"".join([np.asarray(self.stamps, dtype="<f4").tobytes(),
+                            np.asarray(self.present, dtype=np.uint8).tobytes(),
+                            np.asarray(self.points, dtype="<f2").tobytes()])
+        with open(path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.POINTS, len(self)))
+            f.write(zlib.compress(payload, 9))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, points, frames = cls.HEADER.unpack(f.read(cls.HEADER.size))
+            if magic != cls.MAGIC or version != cls.VERSION or points != cls.POINTS:
+                raise ValueError(f"{path} is not a version {cls.VERSION} landmark recording")
+            payload = zlib.decompress(f.read())
+        stamps = np.frombuffer(payload, dtype="<f4", count=frames)
+        present = np.frombuffer(payload, dtype=np.uint8, count=frames, offset=4 * frames)
+        xyz = np.frombuffer(payload, dtype="<f2", offset=5 * frames)
+        return cls(stamps.astype(float), present.astype(bool),
+                   xyz.reshape(frames, points, 3).astype(np.float32))
+
+
+def synthetic_recording(frames=900, fps=30, seed=0, glitches=0.03):
+    """A hand drifting around the frame, holding each gesture for two seconds
+    and leaving the view for half a second out of every ten. A `glitches`
+    fraction of frames is misread as a random gesture, like a real detector."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / fps
+    gesture = (t // 2).astype(int) % len(GESTURES)
+    misread = rng.random(frames) < glitches
+    gesture[misread] = rng.integers(0, len(GESTURES), misread.sum())
+
+    # Hand template relative to the middle-finger knuckle (landmark 9),
+    # image y pointing down; one per gesture in GESTURES order
+    thumbs = {True: [(-0.05, 0.08), (-0.07, 0.05), (-0.09, 0.03), (-0.12, 0.02)],
+              False: [(-0.05, 0.08), (-0.06, 0.06), (-0.07, 0.04), (-0.03, 0.03)]}
+    hands = {"SQUARE": (False, 0), "HEART": (True, 0), "MAGIC": (False, 2),
+             "WALL": (False, 4), "VORTEX": (True, 4)}
+    templates = np.zeros((len(GESTURES), LandmarkRecording.POINTS, 3), dtype=np.float32)
+    for g, name in enumerate(GESTURES):
+        thumb, fingers = hands[name]
+        templates[g, 0, :2] = (0.0, 0.12)
+        templates[g, 1:5, :2] = thumbs[thumb]
+        for f, x in enumerate((-0.02, 0.02, 0.05, 0.08)):
+            up = f < fingers
+            templates[g, 5 + 4*f:9 + 4*f, :2] = [(x - 0.02, 0.0), (x, -0.05),
+                                                (x, -0.08 if up else -0.03), (x, -0.11 if up else 0.0)]
+        templates[g] -= templates[g, 9]
+
+    center = np.stack([0.5 + 0.25*np.sin(t*0.9), 0.5 + 0.2*np.cos(t*0.6), np.zeros(frames)], axis=1)
+    points = templates[gesture] + center[:, None, :] + rng.normal(0, 0.003, (frames, LandmarkRecording.POINTS, 3))
+    present = (t % 10) >= 0.5
+    points[~present] = 0
+    return LandmarkRecording(t * 1000, present, points.astype(np.float32))
+
+
+class LandmarkReplay:
+    """Hand input that plays a LandmarkRecording back in real time, looping"""
+    def __init__(self, recording, loop=True):
+        self.recording = recording
+        self.stamps = np.asarray(recording.stamps)
+        self.loop = loop
+        self.index = -1
+        self.state = HandState()
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def stop(self):
+        pass
+
+    def latest(self):
+        elapsed = (time.perf_counter() - self.start_time) * 1000 + self.stamps[0]
+        if self.loop and self.recording.duration:
+            elapsed = self.stamps[0] + (elapsed - self.stamps[0]) % self.recording.duration
+        i = max(int(np.searchsorted(self.stamps, elapsed, side="right")) - 1, 0)
+        if i != self.index:
+            self.index = i
+            self.state = hand_state(self.recording.landmarks(i), time.perf_counter())
+        return self.state
+
+    def stats(self):
+        return f"replay frame {self.index + 1}/{len(self.recording)}"
+
+# ======================
+# BENCHMARK
+# ======================
+def benchmark_swarm(count, frames=300, seed=0):
+    """Time swarm updates and vertex fills per formation with a moving hand,
+    no camera or display"""
+    swarm = Swarm(count, seed=seed)
+    renderer = SwarmRenderer()
+    budget = 1000 / 60
+    print(f"\n⚔️  Swarm benchmark: {count:,} swords, {frames} frames per gesture")
+    print("-" * 58)
+    print(f"{'gesture':<8} {'update ms':>10} {'fill ms':>8} {'max FPS':>9} {'60 FPS':>8}")
+    for gesture in GESTURES + ("IDLE",):
+        active = gesture != "IDLE"
+        swarm.update((0, 0, 0), gesture, active, 0)  # warm up
+        renderer.fill(swarm)
+        update = fill = 0.0
+        for f in range(frames):
+            t_ms = f * budget
+            hand = (math.sin(t_ms * 0.001) * 10, math.cos(t_ms * 0.0013) * 8, 0)
+            start = time.perf_counter()
+            swarm.update(hand, gesture, active, t_ms)
+            mid = time.perf_counter()
+            renderer.fill(swarm)
+            update += mid - start
+            fill += time.perf_counter() - mid
+        update, fill = update / frames * 1000, fill / frames * 1000
+        ms = update + fill
+        print(f"{gesture:<8} {update:10.3f} {fill:8.3f} {1000 / ms:9.0f} "
+              f"{'ok' if ms < budget else 'MISS':>8}")
+
+def benchmark_pipeline(recording, count, frames=None):
+    """Replay landmarks through classification, filtering, swarm update and
+    vertex fill as fast as possible and time each stage"""
+    frames = frames or len(recording)
+    swarm = Swarm(count, seed=0)
+    renderer = SwarmRenderer()
+    hand_filter = HandFilter()
+    stages = {name: np.empty(frames) for name in ("decode", "classify", "filter", "update", "fill")}
+    gestures = Counter()
+    switches = Counter()
+    previous = {}
+
+    start = time.perf_counter()
+    for f in range(frames):
+        i = f % len(recording)
+        t0 = time.perf_counter()
+        landmarks = recording.landmarks(i)
+        t1 = time.perf_counter()
+        raw = hand_state(landmarks, t1)
+        t2 = time.perf_counter()
+        hand = hand_filter.update(raw, f / 30)
+        t3 = time.perf_counter()
+        swarm.update(hand.target, hand.gesture, hand.active, recording.stamps[i])
+        t4 = time.perf_counter()
+        renderer.fill(swarm)
+        t5 = time.perf_counter()
+        for name, took in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+            stages[name][f] = took
+        gestures[hand.gesture if hand.active else "no hand"] += 1
+        for kind, state in (("raw", raw), ("filtered", hand)):
+            shown = state.gesture if state.active else None
+            switches[kind] += f > 0 and shown != previous[kind]
+            previous[kind] = shown
+    wall = time.perf_counter() - start
+
+    print(f"\n✋ Pipeline benchmark: {frames} recorded frames, {count:,} swords")
+    print("-" * 40)
+    print(f"{'stage':<10} {'mean µs':>9} {'p99 µs':>9}")
+    for name, times in stages.items():
+        print(f"{name:<10} {times.mean() * 1e6:9.1f} {np.percentile(times, 99) * 1e6:9.1f}")
+    print("-" * 40)
+    print(f"{frames / wall:.0f} frames/s   gestures: "
+          + ", ".join(f"{g} {n}" for g, n in gestures.most_common()))
+    print(f"gesture switches: {switches['raw']} raw, {switches['filtered']} filtered")
+
 # ======================
 # EXECUTION ENGINE
 # ======================
-pygame.init()
-pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL)
-glEnable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE) # Glow effect
-gluPerspective(45, (WIDTH/HEIGHT), 0.1, 100.0)
-glTranslatef(0, 0, -45)
-
-base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
-options = vision.HandLandmarkerOptions(base_options=base_options, num_hands=1)
-detector = vision.HandLandmarker.create_from_options(options)
-
-cap = cv2.VideoCapture(0)
-swords = [Sword() for _ in range(MAX_SWORDS)]
-clock = pygame.time.Clock()
-
-while True:
-    for event in pygame.event.get():
-        if event.type == QUIT: pygame.quit(); exit()
-
-    ret, frame = cap.read()
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    mp_img = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
-    result = detector.detect(mp_img)
-
-    h_target = [0,0,0]; h_active = False; gesture = "VORTEX"
-
-    if result.hand_landmarks:
-        h_active = True
-        lms = result.hand_landmarks[0]
-        gesture = get_gesture(lms)
-        h_target = [(lms[9].x - 0.5) * 55, (0.5 - lms[9].y) * 45, 0]
-
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    
-    # Global rotation for 3D depth
-    glPushMatrix()
-    glRotatef(pygame.time.get_ticks() * 0.01, 0, 1, 0)
-    for s in swords:
-        s.update(h_target, gesture, h_active)
-        s.draw()
-    glPopMatrix()
-    
-    pygame.display.flip()
-    clock.tick(60)
\ No newline at end of file
+def main(swords=MAX_SWORDS, hand_input=None):
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL)
+    glEnable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE) # Glow effect
+    gluPerspective(45, (WIDTH/HEIGHT), 0.1, 100.0)
+    glTranslatef(0, 0, -45)
+
+    # Rendering never waits on the camera or the model: it uses the last known hand
+    hand_input = (hand_input or InputPipeline(VideoSource(0), RoiTracker(mediapipe_detector()))).start()
+    hand_filter = HandFilter()
+    swarm = Swarm(swords)
+    renderer = SwarmRenderer()
+    clock = pygame.time.Clock()
+
+    frames = 0
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                hand_input.stop()
+                pygame.quit()
+                return
+
+        hand = hand_filter.update(hand_input.latest(), time.perf_counter())
+
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        # Global rotation for 3D depth
+        now = pygame.time.get_ticks()
+        glPushMatrix()
+        glRotatef(now * 0.01, 0, 1, 0)
+        swarm.update(hand.target, hand.gesture, hand.active, now)
+        renderer.draw(swarm)
+        glPopMatrix()
+
+        pygame.display.flip()
+        clock.tick(60)
+
+        frames += 1
+        if frames % 60 == 0:
+            pygame.display.set_caption(f"Swords: {clock.get_fps():.0f} FPS | {hand_input.stats()}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gesture-controlled sword swarm")
+    parser.add_argument("--swords", type=int, default=MAX_SWORDS)
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time swarm updates for every gesture, no camera or display")
+    parser.add_argument("--frames", type=int, help="frames per gesture (--benchmark) or in "
+                                                      "total (--pipeline-bench)")
+    parser.add_argument("--pipeline-bench", nargs="?", const="", metavar="RECORDING",
+                        help="time gesture classification and swarm updates over a landmark "
+                             "recording (synthetic if omitted), no camera, model or display")
+    parser.add_argument("--record", metavar="PATH", help="save detected landmarks while playing")
+    parser.add_argument("--full-frame", action="store_true",
+                        help="run the hand model on every full frame instead of tracking a crop")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--camera", type=int, default=0, help="webcam index")
+    source.add_argument("--video", metavar="PATH", help="play a recorded video instead of the webcam")
+    source.add_argument("--synthetic", action="store_true",
+                        help="feed generated frames instead of the webcam")
+    source.add_argument("--replay", metavar="PATH", help="play back a landmark recording")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark:
+        benchmark_swarm(args.swords, args.frames or 300)
+    elif args.pipeline_bench is not None:
+        recording = (LandmarkRecording.load(args.pipeline_bench) if args.pipeline_bench
+                     else synthetic_recording())
+        benchmark_pipeline(recording, args.swords, args.frames)
+    elif args.replay:
+        main(args.swords, LandmarkReplay(LandmarkRecording.load(args.replay)))
+    else:
+        recording = LandmarkRecording() if args.record else None
+        source = SyntheticSource() if args.synthetic else VideoSource(args.video or args.camera)
+        detect = mediapipe_detector() if args.full_frame else RoiTracker(mediapipe_detector())
+        main(args.swords, InputPipeline(source, detect, recording=recording))
+        if recording is not None:
+            recording.save(args.record)
+            print(f"Recording saved: {args.record} ({len(recording)} frames)")
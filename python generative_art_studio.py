@@ -3,13 +3,42 @@ Generative Art Studio - Create Stunning Visual Art for Instagram
 Produces mesmerizing patterns, fractals, and animations perfect for social media
 """
 
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation, PillowWriter
-from PIL import Image, ImageDraw, ImageFilter
 import colorsys
 from datetime import datetime
 import os
+import io
+import sys
+import json
+import time
+import argparse
+import importlib
+
+
+class _LazyModule:
+    """Stand-in that imports the real module on first attribute access"""
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            if self._on_import:
+                self._on_import()
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def _select_backend():
+    """Render off-screen with Agg unless a backend was asked for explicitly"""
+    import matplotlib
+    if not os.environ.get("MPLBACKEND"):
+        matplotlib.use("Agg")
+
+
+# numpy and matplotlib are only loaded once a generator actually runs
+np = _LazyModule("numpy")
+plt = _LazyModule("matplotlib.pyplot", on_import=_select_backend)
 
 class GenerativeArtStudio:
     def __init__(self, width=1080, height=1080):
@@ -18,41 +47,116 @@ class GenerativeArtStudio:
         self.height = height
         self.dpi = 150
         
-    def spiral_galaxy(self, arms=5, particles=5000):
-        """Create mesmerizing spiral galaxy effect"""
+    def spiral_galaxy(self, arms=5, particles=5000, mode='scatter', glow=0.6):
+        """Create mesmerizing spiral galaxy effect
+
+        mode='scatter' draws every star as a marker in a single scatter call.
+        mode='density' splats stars into a pixel buffer with additive blending,
+        which stays fast for millions of stars.
+        """
+        if mode == 'density':
+            return self._spiral_galaxy_density(arms, particles, glow)
+
         fig, ax = plt.subplots(figsize=(10, 10), facecolor='black')
         ax.set_facecolor('black')
         ax.set_xlim(-2, 2)
         ax.set_ylim(-2, 2)
         ax.axis('off')
         
-        for arm in range(arms):
-            theta = np.linspace(0, 4*np.pi, particles//arms)
-            r = np.linspace(0.1, 2, particles//arms)
-            
-            # Add spiral offset for each arm
-            offset = (2*np.pi*arm)/arms
-            x = r * np.cos(theta*2 + offset) + np.random.normal(0, 0.05, particles//arms)
-            y = r * np.sin(theta*2 + offset) + np.random.normal(0, 0.05, particles//arms)
-            
-            # Color gradient from center to edge
-            colors = plt.cm.plasma(r/2)
-            sizes = 100 * (1 - r/2) * np.random.random(particles//arms)
-            
-            ax.scatter(x, y, c=colors, s=sizes, alpha=0.6, edgecolors='none')
+        # All arms at once, followed by the central glow so it draws on top
+        x, y, r = self._galaxy_arm_stars(arms, particles, 0, arms * (particles//arms))
+        x_center, y_center = self._galaxy_core_stars(500)
+        
+        # Color gradient from center to edge, white core
+        colors = np.empty((len(x) + len(x_center), 4))
+        colors[:len(x)] = plt.cm.plasma(r/2)
+        colors[:len(x), 3] = 0.6
+        colors[len(x):] = (1, 1, 1, 0.8)
+        sizes = np.concatenate([100 * (1 - r/2) * np.random.random(len(r)),
+                                np.full(len(x_center), 50.0)])
+        
+        ax.scatter(np.concatenate([x, x_center]), np.concatenate([y, y_center]),
+                   c=colors, s=sizes, edgecolors='none')
+        
+        plt.tight_layout(pad=0)
+        return fig
+    
+    def _galaxy_arm_stars(self, arms, particles, start, stop):
+        """Positions of arm stars with global index in [start, stop)"""
+        per_arm = particles // arms
+        k = np.arange(start, stop)
+        arm, i = np.divmod(k, per_arm)
+        t = i / max(per_arm - 1, 1)
+        theta = 4*np.pi * t
+        r = 0.1 + 1.9 * t
+        
+        # Add spiral offset for each arm
+        angle = theta*2 + (2*np.pi*arm)/arms
+        x = r * np.cos(angle) + np.random.normal(0, 0.05, len(k))
+        y = r * np.sin(angle) + np.random.normal(0, 0.05, len(k))
+        return x, y, r
+    
+    def _galaxy_core_stars(self, count):
+        r_center = np.random.exponential(0.1, count)
+        theta_center = np.random.uniform(0, 2*np.pi, count)
+        return r_center * np.cos(theta_center), r_center * np.sin(theta_center)
+    
+    def _spiral_galaxy_density(self, arms, particles, glow, chunk=1_000_000):
+        """Splat stars into an HDR buffer, add one Gaussian glow pass, tone map"""
+        w, h = self.width, self.height
+        buf = np.zeros((3, h * w))
+        lut = plt.cm.plasma(np.linspace(0, 1, 256))[:, :3]
+        
+        def splat(x, y, rgb, weight):
+            px = ((x + 2) / 4 * w).astype(np.intp)
+            py = ((y + 2) / 4 * h).astype(np.intp)
+            keep = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+            idx = py[keep] * w + px[keep]
+            weight = weight[keep]
+            for c in range(3):
+                channel = rgb[keep, c] if rgb.ndim == 2 else rgb[c]
+                buf[c] += np.bincount(idx, weights=weight * channel, minlength=h * w)
         
-        # Add central glow
-        center_particles = 500
-        r_center = np.random.exponential(0.1, center_particles)
-        theta_center = np.random.uniform(0, 2*np.pi, center_particles)
-        x_center = r_center * np.cos(theta_center)
-        y_center = r_center * np.sin(theta_center)
+        # Generate in chunks so memory stays flat at 10M+ stars
+        total = arms * (particles // arms)
+        for start in range(0, total, chunk):
+            x, y, r = self._galaxy_arm_stars(arms, particles, start, min(start + chunk, total))
+            colors = lut[(r / 2 * 255).astype(np.intp)]
+            splat(x, y, colors, (1 - r/2) * np.random.random(len(r)))
         
-        ax.scatter(x_center, y_center, c='white', s=50, alpha=0.8, edgecolors='none')
+        core = max(500, particles // 10)
+        x_center, y_center = self._galaxy_core_stars(core)
+        splat(x_center, y_center, np.ones(3), np.full(core, 1.5))
         
+        img = buf.reshape(3, h, w)
+        if glow:
+            img = img + glow * self._gaussian_blur(img, sigma=0.01 * max(w, h))
+        
+        # Log tone map: the arms stay visible next to the much denser core
+        lum = img.sum(axis=0)
+        lit = lum[lum > 0]
+        if lit.size:
+            mid = np.median(lit)
+            img = np.log1p(4 * img / mid) / np.log1p(4 * np.percentile(lit, 99.5) / mid)
+        img = np.minimum(img, 1)
+        
+        fig, ax = plt.subplots(figsize=(10, 10), facecolor='black')
+        ax.axis('off')
+        ax.imshow(np.moveaxis(img, 0, -1), extent=[-2, 2, -2, 2], origin='lower',
+                  interpolation='bilinear')
         plt.tight_layout(pad=0)
         return fig
     
+    @staticmethod
+    def _gaussian_blur(img, sigma):
+        """Gaussian blur of a (channels, h, w) buffer in the frequency domain"""
+        h, w = img.shape[-2:]
+        fy = np.fft.fftfreq(h)[:, None]
+        fx = np.fft.rfftfreq(w)[None, :]
+        kernel = np.exp(-2 * (np.pi * sigma)**2 * (fx**2 + fy**2))
+        blurred = np.fft.irfft2(np.fft.rfft2(img) * kernel, s=(h, w))
+        return np.maximum(blurred, 0, out=blurred)  # drop FFT round-off below zero
+    
     def mandelbrot_zoom(self, center_x=-0.5, center_y=0, zoom=1, max_iter=100):
         """Generate stunning Mandelbrot fractal"""
         fig, ax = plt.subplots(figsize=(10, 10))
@@ -79,8 +183,10 @@ class GenerativeArtStudio:
         plt.tight_layout(pad=0)
         return fig
     
-    def particle_flow(self, num_particles=3000):
+    def particle_flow(self, num_particles=3000, frames=200):
         """Create flowing particle animation"""
+        from matplotlib.animation import FuncAnimation
+        
         fig, ax = plt.subplots(figsize=(10, 10), facecolor='black')
         ax.set_facecolor('black')
         ax.set_xlim(0, 1)
@@ -122,7 +228,7 @@ class GenerativeArtStudio:
             
             return scatter,
         
-        anim = FuncAnimation(fig, update, frames=200, interval=50, blit=True)
+        anim = FuncAnimation(fig, update, frames=frames, interval=50, blit=True)
         return fig, anim
     
     def geometric_mandala(self, layers=12, symmetry=8):
@@ -240,6 +346,8 @@ class GenerativeArtStudio:
     
     def save_animation(self, fig, anim, name):
         """Save animation as GIF"""
+        from matplotlib.animation import PillowWriter
+        
         # Create output folder if it doesn't exist
         output_dir = "instagram_art"
         os.makedirs(output_dir, exist_ok=True)
@@ -255,6 +363,213 @@ class GenerativeArtStudio:
         plt.close(fig)
         return filename
 
+# ======================
+# RENDER BENCHMARK
+# ======================
+BENCH_RESOLUTIONS = [540, 1080, 2160]
+
+BENCH_MATRIX = {
+    "spiral_galaxy": [{"arms": 5, "particles": 5000}, {"arms": 7, "particles": 50000},
+                      {"arms": 7, "particles": 10_000_000, "mode": "density"}],
+    "mandelbrot_zoom": [{"max_iter": 100}, {"max_iter": 300, "zoom": 4}],
+    "particle_flow": [{"num_particles": 2000, "frames": 20}],
+    "geometric_mandala": [{"layers": 12, "symmetry": 8}, {"layers": 15, "symmetry": 12}],
+    "wave_interference": [{"num_sources": 5}, {"num_sources": 15}],
+    "neon_grid": [{"grid_size": 20}, {"grid_size": 40}],
+}
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it can't be read"""
+    try:
+        import resource
+    except ImportError:  # Windows: fall back to psutil's peak working set if installed
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def _bench_case(generator, params, resolution, seed=0):
+    """Run one generator headless and split compute time from rasterization"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot, matplotlib.animation  # keep import cost out of the timings
+    np.random.seed(seed)
+
+    studio = GenerativeArtStudio(width=resolution, height=resolution)
+    studio.dpi = resolution / 10  # figures are 10in wide, keep output at `resolution` px
+
+    start = time.perf_counter()
+    result = getattr(studio, generator)(**params)
+    compute = time.perf_counter() - start
+
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    if generator == "particle_flow":
+        # Animation frames are simulated while saving, so "render" covers both
+        import tempfile
+        from matplotlib.animation import PillowWriter
+        fig, anim = result
+        with tempfile.TemporaryDirectory() as tmp:
+            anim.save(os.path.join(tmp, "bench.gif"), writer=PillowWriter(fps=20), dpi=studio.dpi)
+    else:
+        fig = result
+        fig.savefig(buf, dpi=studio.dpi, format="png", facecolor=fig.get_facecolor())
+    render = time.perf_counter() - start
+    plt.close(fig)
+
+    rss = _peak_rss_mb()
+    return {
+        "generator": generator,
+        "params": params,
+        "resolution": resolution,
+        "compute_s": round(compute, 4),
+        "render_s": round(render, 4),
+        "wall_s": round(compute + render, 4),
+        "peak_rss_mb": None if rss is None else round(rss, 1),
+    }
+
+
+def _bench_worker(args):
+    return _bench_case(*args)
+
+
+def _case_key(case):
+    params = ",".join(f"{k}={v}" for k, v in sorted(case["params"].items()))
+    return f"{case['generator']}[{params}]@{case['resolution']}"
+
+
+def run_benchmark(generators=None, resolutions=None, repeat=1):
+    """Run every generator across the parameter and resolution matrix.
+
+    Each case runs in a fresh process so peak RSS is per case, not cumulative.
+    """
+    import multiprocessing as mp
+
+    generators = generators or list(BENCH_MATRIX)
+    resolutions = resolutions or BENCH_RESOLUTIONS
+    jobs = [(g, params, res) for g in generators
+            for params in BENCH_MATRIX[g] for res in resolutions]
+
+    ctx = mp.get_context("spawn")
+    cases = []
+    for job in jobs:
+        runs = []
+        for _ in range(repeat):
+            with ctx.Pool(1) as pool:
+                runs.append(pool.apply(_bench_worker, (job,)))
+        best = min(runs, key=lambda c: c["wall_s"])
+        rss = [c["peak_rss_mb"] for c in runs if c["peak_rss_mb"] is not None]
+        best["peak_rss_mb"] = max(rss) if rss else None
+        cases.append(best)
+        rss = "n/a" if best["peak_rss_mb"] is None else f"{best['peak_rss_mb']:.0f}MB"
+        print(f"  {_case_key(best):<60} wall {best['wall_s']:7.3f}s "
+              f"(compute {best['compute_s']:.3f}s / render {best['render_s']:.3f}s) "
+              f"rss {rss}")
+
+    import matplotlib
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "backend": "Agg",
+        "cases": cases,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.10):
+    """Compare wall time and RSS per case, returning the list of regressions"""
+    base_cases = {_case_key(c): c for c in baseline["cases"]}
+    regressions = []
+    print("\n📊 Comparison against baseline")
+    print("-" * 60)
+    for case in report["cases"]:
+        key = _case_key(case)
+        base = base_cases.get(key)
+        if base is None:
+            print(f"  {key:<60} (new case)")
+            continue
+        ratio = case["wall_s"] / base["wall_s"] if base["wall_s"] else float("inf")
+        if case["peak_rss_mb"] is None or base["peak_rss_mb"] is None:
+            rss_ratio = 1.0  # not measured on one side, so only time is compared
+        else:
+            rss_ratio = case["peak_rss_mb"] / base["peak_rss_mb"] if base["peak_rss_mb"] else float("inf")
+        case["baseline_ratio"] = round(ratio, 3)
+        flag = ""
+        if ratio > 1 + tolerance or rss_ratio > 1 + tolerance:
+            flag = "  ⚠ REGRESSION"
+            regressions.append(key)
+        print(f"  {key:<60} x{ratio:5.2f} time  x{rss_ratio:5.2f} rss{flag}")
+    return regressions
+
+
+IMPORT_BUDGET_S = 0.15
+HEAVY_MODULES = ("numpy", "matplotlib", "PIL")
+
+
+def import_benchmark(runs=10, budget=IMPORT_BUDGET_S):
+    """Time a cold import of this script in fresh interpreters.
+
+    Fails if the median exceeds the budget or a heavy module is loaded eagerly.
+    """
+    import subprocess
+    import statistics
+
+    probe = (
+        "import sys, time, runpy\n"
+        "t = time.perf_counter()\n"
+        f"runpy.run_path({os.path.abspath(__file__)!r}, run_name='import_probe')\n"
+        "dt = time.perf_counter() - t\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(dt, ','.join(heavy))\n"
+    )
+    times, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", probe], capture_output=True,
+                             text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        heavy.update(out[1].split(",") if len(out) > 1 else [])
+
+    median = statistics.median(times)
+    print("⏱  Cold import benchmark")
+    print("-" * 30)
+    print(f"  median {median*1000:.1f}ms | min {min(times)*1000:.1f}ms | max {max(times)*1000:.1f}ms "
+          f"over {runs} runs (budget {budget*1000:.0f}ms)")
+    if heavy:
+        print(f"  ⚠ Loaded at import: {', '.join(sorted(heavy))}")
+    return 0 if median <= budget and not heavy else 1
+
+
+def benchmark_main(args):
+    """Entry point for --benchmark"""
+    print("⏱  Generative Art Studio - Render Benchmark")
+    print("=" * 60)
+    report = run_benchmark(args.generators, args.resolutions, args.repeat)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Report written: {os.path.abspath(args.report)}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved: {os.path.abspath(args.save_baseline)}")
+
+    return 1 if regressions else 0
+
+
 def main():
     """Generate a collection of stunning artworks"""
     print("🎨 Generative Art Studio - Instagram Edition")
@@ -291,7 +606,35 @@ def main():
     print("📸 Ready to post on Instagram!")
     print("💡 Tip: Use filters and add music for maximum engagement")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generative Art Studio")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="run the headless render benchmark instead of generating art")
+    parser.add_argument("--import-benchmark", action="store_true",
+                        help="time a cold import of this script and check no heavy module loads")
+    parser.add_argument("--generators", nargs="+", choices=list(BENCH_MATRIX),
+                        help="generators to benchmark (default: all)")
+    parser.add_argument("--resolutions", nargs="+", type=int,
+                        help=f"output sizes in px (default: {BENCH_RESOLUTIONS})")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs per case, the fastest is reported")
+    parser.add_argument("--report", default="art_benchmark.json",
+                        help="where to write the JSON report")
+    parser.add_argument("--baseline", default="art_benchmark_baseline.json",
+                        help="baseline report to compare against, if it exists")
+    parser.add_argument("--save-baseline", metavar="PATH",
+                        help="also store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before a case counts as a regression")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.import_benchmark:
+        raise SystemExit(import_benchmark())
+    if args.benchmark:
+        raise SystemExit(benchmark_main(args))
     print("Required packages: numpy, matplotlib, pillow")
     print("Install: pip install numpy matplotlib pillow")
     print()